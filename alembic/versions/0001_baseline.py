@@ -0,0 +1,140 @@
+"""baseline schema
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+Tables as create_db_and_tables() has been creating them. Databases that
+predate Alembic already have them; each table is only created when
+missing, so ``alembic upgrade head`` adopts such a database as is.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_baseline'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _missing(table: str) -> bool:
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _missing('users'):
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Uuid(), nullable=False),
+            sa.Column('username', sqlmodel.AutoString(), nullable=False),
+            sa.Column('phone', sqlmodel.AutoString(), nullable=True),
+            sa.Column('full_name', sqlmodel.AutoString(), nullable=True),
+            sa.Column('email', sqlmodel.AutoString(), nullable=True),
+            sa.Column('team', sqlmodel.AutoString(), nullable=True),
+            sa.Column('address', sqlmodel.AutoString(), nullable=True),
+            sa.Column('hashed_password', sqlmodel.AutoString(), nullable=False),
+            sa.Column('role', sa.Enum('ADMIN', 'USER', name='userrole'), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+        op.create_index('ix_users_phone', 'users', ['phone'], unique=True)
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if _missing('mlmodels'):
+        op.create_table(
+            'mlmodels',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sqlmodel.AutoString(), nullable=False),
+            sa.Column('version', sqlmodel.AutoString(), nullable=False),
+            sa.Column('description', sqlmodel.AutoString(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if _missing('predictions'):
+        op.create_table(
+            'predictions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Uuid(), nullable=False),
+            sa.Column('input_data', sqlmodel.AutoString(), nullable=False),
+            sa.Column('prediction', sa.Integer(), nullable=False),
+            sa.Column('probability', sa.Float(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if _missing('predictionmetadata'):
+        op.create_table(
+            'predictionmetadata',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('prediction_id', sa.Integer(), nullable=False),
+            sa.Column('model_id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['model_id'], ['mlmodels.id']),
+            sa.ForeignKeyConstraint(['prediction_id'], ['predictions.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('prediction_id'),
+        )
+
+    if _missing('feedbacks'):
+        op.create_table(
+            'feedbacks',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('prediction_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Uuid(), nullable=False),
+            sa.Column('correct', sa.Boolean(), nullable=True),
+            sa.Column('comment', sqlmodel.AutoString(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['prediction_id'], ['predictions.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if _missing('predictionlogs'):
+        op.create_table(
+            'predictionlogs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('prediction_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Uuid(), nullable=False),
+            sa.Column('request_ip', sqlmodel.AutoString(), nullable=True),
+            sa.Column('user_agent', sqlmodel.AutoString(), nullable=True),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['prediction_id'], ['predictions.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if _missing('shadowpredictions'):
+        op.create_table(
+            'shadowpredictions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('prediction_id', sa.Integer(), nullable=False),
+            sa.Column('primary_version', sqlmodel.AutoString(), nullable=False),
+            sa.Column('candidate_version', sqlmodel.AutoString(), nullable=False),
+            sa.Column('primary_probability', sa.Float(), nullable=False),
+            sa.Column('candidate_probability', sa.Float(), nullable=False),
+            sa.Column('candidate_latency_ms', sa.Float(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['prediction_id'], ['predictions.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_shadowpredictions_prediction_id', 'shadowpredictions', ['prediction_id'])
+        op.create_index('ix_shadowpredictions_candidate_version', 'shadowpredictions', ['candidate_version'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('shadowpredictions', 'predictionlogs', 'feedbacks', 'predictionmetadata',
+                  'predictions', 'mlmodels', 'users'):
+        op.drop_table(table)
+    sa.Enum(name='userrole').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,57 @@
+"""bigint snowflake prediction ids
+
+Revision ID: 0002_snowflake_ids
+Revises: 0001_baseline
+Create Date: 2026-10-18 09:30:00.000000
+
+Predictions, their metadata and log rows now get 64-bit time-ordered ids
+from utils.ids instead of serial ids. Existing ids are kept: every
+snowflake is far above the largest serial id, so new rows sort after old
+ones. The serial defaults stay (as bigint sequences) so workers still on
+the previous release keep inserting during a rolling deploy.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_snowflake_ids'
+down_revision: Union[str, Sequence[str], None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, owns a serial sequence)
+COLUMNS = [
+    ('predictions', 'id', True),
+    ('predictionmetadata', 'id', True),
+    ('predictionmetadata', 'prediction_id', False),
+    ('predictionlogs', 'id', True),
+    ('predictionlogs', 'prediction_id', False),
+    ('feedbacks', 'prediction_id', False),
+    ('shadowpredictions', 'prediction_id', False),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Workers draw their snowflake node id from this sequence at startup
+    op.execute("CREATE SEQUENCE IF NOT EXISTS snowflake_node_seq")
+    for table, column, serial in COLUMNS:
+        op.alter_column(table, column, type_=sa.BigInteger(), existing_type=sa.Integer(), existing_nullable=False)
+        if serial:
+            op.execute(f"ALTER SEQUENCE IF EXISTS {table}_{column}_seq AS BIGINT")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    for table, column, serial in COLUMNS:
+        if serial and bind.execute(sa.text(f"SELECT max({column}) > 2147483647 FROM {table}")).scalar():
+            raise RuntimeError(f"{table}.{column} holds snowflake ids; they don't fit in INTEGER")
+    for table, column, serial in reversed(COLUMNS):
+        if serial:
+            op.execute(f"ALTER SEQUENCE IF EXISTS {table}_{column}_seq AS INTEGER")
+        op.alter_column(table, column, type_=sa.Integer(), existing_type=sa.BigInteger(), existing_nullable=False)
+    op.execute("DROP SEQUENCE IF EXISTS snowflake_node_seq")
@@ -0,0 +1,61 @@
+"""model_id and model_version on predictions
+
+Revision ID: 0003_prediction_model_columns
+Revises: 0002_snowflake_ids
+Create Date: 2026-10-18 10:15:00.000000
+
+Predictions record the model that made them directly instead of through
+the one-to-one predictionmetadata table. Existing rows are backfilled
+from predictionmetadata. The table itself stays for now: workers still on
+the previous release keep writing it during a rolling deploy, and reads
+fall back to it for predictions without model_id.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_prediction_model_columns'
+down_revision: Union[str, Sequence[str], None] = '0002_snowflake_ids'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('predictions', sa.Column('model_id', sa.Integer(), nullable=True))
+    op.add_column('predictions', sa.Column('model_version', sqlmodel.AutoString(), nullable=True))
+    op.create_foreign_key('predictions_model_id_fkey', 'predictions', 'mlmodels', ['model_id'], ['id'])
+
+    op.execute(
+        """
+        UPDATE predictions AS p
+           SET model_id = m.id, model_version = m.version
+          FROM predictionmetadata AS pm
+          JOIN mlmodels AS m ON m.id = pm.model_id
+         WHERE pm.prediction_id = p.id
+           AND p.model_id IS NULL
+        """
+    )
+    op.create_index('ix_predictions_model_id', 'predictions', ['model_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Give predictions written since the upgrade their metadata row back
+    op.execute(
+        """
+        INSERT INTO predictionmetadata (prediction_id, model_id, created_at)
+        SELECT p.id, p.model_id, p.created_at
+          FROM predictions AS p
+         WHERE p.model_id IS NOT NULL
+           AND NOT EXISTS (SELECT 1 FROM predictionmetadata pm WHERE pm.prediction_id = p.id)
+        """
+    )
+    op.drop_index('ix_predictions_model_id', table_name='predictions')
+    op.drop_constraint('predictions_model_id_fkey', 'predictions', type_='foreignkey')
+    op.drop_column('predictions', 'model_version')
+    op.drop_column('predictions', 'model_id')
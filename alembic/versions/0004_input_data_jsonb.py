@@ -0,0 +1,53 @@
+"""store predictions.input_data as JSONB
+
+Revision ID: 0004_input_data_jsonb
+Revises: 0003_prediction_model_columns
+Create Date: 2026-10-18 11:00:00.000000
+
+input_data was free text holding JSON. As JSONB it is parsed once on
+write and can be filtered and projected in SQL (input_data->>'CreditRating').
+Rows written by DataFrame.to_json() ({"col": {"0": value}}) are flattened
+to {"col": value} on the way, so every row has the shape of ChurnInput.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_input_data_jsonb'
+down_revision: Union[str, Sequence[str], None] = '0003_prediction_model_columns'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        'predictions', 'input_data',
+        type_=postgresql.JSONB(), existing_type=sa.String(), existing_nullable=False,
+        postgresql_using='input_data::jsonb',
+    )
+    op.execute(
+        """
+        UPDATE predictions
+           SET input_data = (SELECT jsonb_object_agg(key, value -> '0') FROM jsonb_each(input_data))
+         WHERE jsonb_typeof(input_data) = 'object'
+           AND input_data <> '{}'::jsonb
+           AND NOT EXISTS (
+               SELECT 1 FROM jsonb_each(input_data) AS e
+                WHERE jsonb_typeof(e.value) <> 'object' OR NOT e.value ? '0'
+           )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        'predictions', 'input_data',
+        type_=sa.String(), existing_type=postgresql.JSONB(), existing_nullable=False,
+        postgresql_using='input_data::text',
+    )
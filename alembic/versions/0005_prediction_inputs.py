@@ -0,0 +1,180 @@
+"""content-addressed prediction_inputs
+
+Revision ID: 0005_prediction_inputs
+Revises: 0004_input_data_jsonb
+Create Date: 2026-10-18 12:00:00.000000
+
+Each distinct input payload is stored once in prediction_inputs, keyed by
+the hash ChurnInput.canonical_hash() computes, and predictions reference
+it by hash. The column and a NOT VALID foreign key are added first, in a
+short transaction; existing rows are then moved over in batches that
+commit one by one, so predictions stay writable and an interrupted run
+resumes where it stopped. The foreign key is validated last.
+"""
+import hashlib
+import json
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_prediction_inputs'
+down_revision: Union[str, Sequence[str], None] = '0004_input_data_jsonb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_ROWS = 5000
+
+# ChurnInput's fields as of this revision. Frozen here, together with the
+# hashing below, so later changes to the schema don't change what this
+# migration computes.
+CHURN_INPUT_FIELDS = {
+    'MonthlyRevenue': float,
+    'MonthlyMinutes': float,
+    'OverageMinutes': float,
+    'UnansweredCalls': int,
+    'CustomerCareCalls': int,
+    'PercChangeMinutes': float,
+    'PercChangeRevenues': float,
+    'InboundCalls': int,
+    'OutboundCalls': int,
+    'ReceivedCalls': int,
+    'TotalRecurringCharge': float,
+    'CurrentEquipmentDays': int,
+    'DroppedBlockedCalls': int,
+    'MonthsInService': int,
+    'ActiveSubs': int,
+    'RespondsToMailOffers': str,
+    'RetentionCalls': int,
+    'RetentionOffersAccepted': int,
+    'MadeCallToRetentionTeam': str,
+    'ReferralsMadeBySubscriber': int,
+    'CreditRating': str,
+    'IncomeGroup': str,
+    'Occupation': str,
+    'PrizmCode': str,
+}
+
+
+def _field(kind, value):
+    """``value`` as ChurnInput validates it into ``kind``, or None if it wouldn't."""
+    if kind is str:
+        return value if isinstance(value, str) else None
+    try:
+        if kind is float:
+            return float(value) if isinstance(value, (bool, int, float, str)) else None
+        if isinstance(value, float):
+            return int(value) if value.is_integer() else None
+        return int(value) if isinstance(value, (bool, int, str)) else None
+    except ValueError:
+        return None
+
+
+def _canonical(data: dict) -> Optional[dict]:
+    """ChurnInput.model_dump() of ``data``, or None if it isn't a ChurnInput."""
+    fields = {}
+    for name, kind in CHURN_INPUT_FIELDS.items():
+        value = _field(kind, data.get(name))
+        if value is None:
+            return None
+        fields[name] = value
+    return fields
+
+
+def _hashed(data: dict):
+    """(hash, payload) as the application would store it."""
+    # Not a ChurnInput (e.g. an old feature frame): hash it as stored
+    payload = _canonical(data) or data
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+    return digest, payload
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'prediction_inputs',
+        sa.Column('hash', sqlmodel.AutoString(length=64), nullable=False),
+        sa.Column('input_data', postgresql.JSONB(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('hash'),
+    )
+    op.add_column('predictions', sa.Column('input_hash', sqlmodel.AutoString(length=64), nullable=True))
+    op.alter_column('predictions', 'input_data', existing_type=postgresql.JSONB(), nullable=True)
+    # NOT VALID: checked for rows written from now on, existing rows are
+    # validated once the backfill is done
+    op.execute(
+        "ALTER TABLE predictions ADD CONSTRAINT predictions_input_hash_fkey"
+        " FOREIGN KEY (input_hash) REFERENCES prediction_inputs (hash) NOT VALID"
+    )
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = -1
+        while True:
+            rows = bind.execute(
+                sa.text(
+                    "SELECT id, input_data, created_at FROM predictions"
+                    " WHERE id > :last_id AND input_hash IS NULL AND input_data IS NOT NULL"
+                    " ORDER BY id LIMIT :n"
+                ),
+                {"last_id": last_id, "n": BATCH_ROWS},
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            inputs, hashes = {}, []
+            for row in rows:
+                data = row.input_data if isinstance(row.input_data, dict) else json.loads(row.input_data)
+                digest, payload = _hashed(data)
+                inputs.setdefault(digest, (json.dumps(payload), row.created_at))
+                hashes.append(digest)
+
+            # One statement per batch, so each batch commits as a whole
+            bind.execute(
+                sa.text(
+                    "WITH new_inputs AS ("
+                    " INSERT INTO prediction_inputs (hash, input_data, created_at)"
+                    " SELECT * FROM unnest(CAST(:input_hashes AS VARCHAR[]),"
+                    " CAST(:payloads AS JSONB[]), CAST(:created_at AS TIMESTAMP[]))"
+                    " ON CONFLICT (hash) DO NOTHING)"
+                    " UPDATE predictions AS p SET input_hash = b.input_hash, input_data = NULL"
+                    " FROM unnest(CAST(:ids AS BIGINT[]), CAST(:hashes AS VARCHAR[])) AS b (id, input_hash)"
+                    " WHERE p.id = b.id"
+                ),
+                {
+                    "input_hashes": list(inputs),
+                    "payloads": [payload for payload, _ in inputs.values()],
+                    "created_at": [created_at for _, created_at in inputs.values()],
+                    "ids": [row.id for row in rows],
+                    "hashes": hashes,
+                },
+            )
+
+        op.execute("ALTER TABLE predictions VALIDATE CONSTRAINT predictions_input_hash_fkey")
+        op.create_index(
+            'ix_predictions_input_hash', 'predictions', ['input_hash'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        """
+        UPDATE predictions AS p
+           SET input_data = pi.input_data
+          FROM prediction_inputs AS pi
+         WHERE pi.hash = p.input_hash
+           AND p.input_data IS NULL
+        """
+    )
+    op.drop_index('ix_predictions_input_hash', table_name='predictions')
+    op.drop_constraint('predictions_input_hash_fkey', 'predictions', type_='foreignkey')
+    op.drop_column('predictions', 'input_hash')
+    op.alter_column('predictions', 'input_data', existing_type=postgresql.JSONB(), nullable=False)
+    op.drop_table('prediction_inputs')
@@ -0,0 +1,46 @@
+"""indexes for prediction search
+
+Revision ID: 0006_prediction_search_indexes
+Revises: 0005_prediction_inputs
+Create Date: 2026-10-18 13:30:00.000000
+
+Each equality filter of /predict/predictions/ (user, model, model version)
+leads an index that continues with the (created_at, id) keyset order, so
+a filtered, time-bounded page is a single index range scan. The plain
+model_id index is covered by (model_id, created_at, id) and is dropped.
+Indexes are built CONCURRENTLY so predictions stay writable meanwhile.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_prediction_search_indexes'
+down_revision: Union[str, Sequence[str], None] = '0005_prediction_inputs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_predictions_created_at_id': ['created_at', 'id'],
+    'ix_predictions_user_id_created_at': ['user_id', 'created_at', 'id'],
+    'ix_predictions_model_id_created_at': ['model_id', 'created_at', 'id'],
+    'ix_predictions_model_version_created_at': ['model_version', 'created_at', 'id'],
+    'ix_predictions_probability': ['probability'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, 'predictions', columns, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_predictions_model_id', table_name='predictions', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_predictions_model_id', 'predictions', ['model_id'], postgresql_concurrently=True, if_not_exists=True)
+        for name in INDEXES:
+            op.drop_index(name, table_name='predictions', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,35 @@
+"""drop the shadowpredictions -> predictions foreign key
+
+Revision ID: 0007_shadow_prediction_fk
+Revises: 0006_prediction_search_indexes
+Create Date: 2026-10-19 09:00:00.000000
+
+With write-behind persistence a shadow comparison row is usually written
+before its prediction has been flushed, and always while the prediction
+sits in a spill file, so the foreign key rejected it. The reference is
+kept as an indexed column; the prediction arrives once it is flushed.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007_shadow_prediction_fk'
+down_revision: Union[str, Sequence[str], None] = '0006_prediction_search_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE shadowpredictions DROP CONSTRAINT IF EXISTS shadowpredictions_prediction_id_fkey")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # NOT VALID: shadow rows of still-spilled predictions may exist
+    op.execute(
+        "ALTER TABLE shadowpredictions ADD CONSTRAINT shadowpredictions_prediction_id_fkey"
+        " FOREIGN KEY (prediction_id) REFERENCES predictions (id) NOT VALID"
+    )
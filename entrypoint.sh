@@ -7,38 +7,28 @@ python /app/init_db.py
 # Navigate to app directory
 cd /app
 
-<<<<<<< HEAD
-# echo "Starting Alembic migrations..."
-
-# # Automatically create a revision if needed (optional)
-# # This will generate a new migration for any detected model changes
-# # Comment out if you only want manual revisions
-# alembic revision --autogenerate -m "auto revision" || echo "No changes detected"
-
-# # Apply all migrations
-# alembic upgrade head
-
-# echo "Migrations applied successfully."
-=======
 echo "Starting Alembic migrations..."
 
-# Automatically create a revision if needed (optional)
-# This will generate a new migration for any detected model changes
-# Comment out if you only want manual revisions
-alembic revision --autogenerate -m "auto revision" || echo "No changes detected"
-
-# Apply all migrations
+# Apply all migrations (revisions are written by hand in alembic/versions;
+# existing databases created by create_all are adopted by the baseline)
 alembic upgrade head
 
 echo "Migrations applied successfully."
->>>>>>> main
 
 # Launch FastAPI with Gunicorn + Uvicorn workers
 # - 4 workers (adjust as needed)
 # - bind to all interfaces on port 8000
+# - PRELOAD_ARTIFACTS=1 loads the model once in the master before forking,
+#   so workers share its memory pages
+
+PRELOAD_FLAG=""
+if [ "${PRELOAD_ARTIFACTS:-0}" = "1" ]; then
+    PRELOAD_FLAG="--preload"
+fi
 
 exec gunicorn src.main:app \
     --workers 4 \
+    $PRELOAD_FLAG \
     --worker-class uvicorn.workers.UvicornWorker \
     --bind 0.0.0.0:8000 \
     --timeout 120
@@ -0,0 +1,168 @@
+import base64
+import json
+import os
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Sequence
+from uuid import UUID
+
+from fastapi import HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select as sa_select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.types import TypeDecorator
+from sqlmodel import Session
+
+DEFAULT_PAGE_SIZE = int(os.getenv("API_DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "1000"))
+# Rows fetched per server-side cursor round trip in streaming mode
+STREAM_CHUNK_ROWS = int(os.getenv("API_STREAM_CHUNK_ROWS", "1000"))
+
+
+class Projection:
+    """``fields=`` query parameter: the columns a list endpoint selects and returns."""
+
+    def __init__(
+        self,
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
+    ):
+        self.fields = fields
+
+    def names(self, allowed: Sequence[str]) -> Optional[List[str]]:
+        """Requested field names in order, or None for every field."""
+        if not self.fields:
+            return None
+        names = list(dict.fromkeys(f.strip() for f in self.fields.split(",") if f.strip()))
+        unknown = [n for n in names if n not in allowed]
+        if unknown or not names:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields {unknown}; choose from {list(allowed)}",
+            )
+        return names
+
+
+def project(model, names: Sequence[str], keys: Sequence):
+    """
+    SELECT of only ``names`` from ``model``, plus the keyset ``keys`` the
+    cursor needs. Rows come back as tuples, never as ORM objects.
+    """
+    return sa_select(*[getattr(model, n) for n in dict.fromkeys([*names, *(k.key for k in keys)])])
+
+
+def rows_as(names: Sequence[str], schema):
+    """
+    ``to_read`` for projected rows: dicts of the requested fields, in
+    ``schema``'s JSON form (string ids and the like).
+    """
+    return lambda session, rows: [as_json(schema, {n: row._mapping[n] for n in names}) for row in rows]
+
+
+def as_json(schema, fields: dict) -> dict:
+    """JSON-ready ``fields`` serialized as ``schema`` would, without requiring its other fields."""
+    return schema.model_construct(**fields).model_dump(mode="json", include=set(fields))
+
+
+class Page:
+    """Query parameters shared by the list endpoints."""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Rows per page"),
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+        stream: bool = Query(False, description="Stream every row after the cursor as NDJSON"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.stream = stream
+
+
+def paginate(
+    session: Session,
+    stmt,
+    keys: Sequence,
+    page: Page,
+    response: Response,
+    to_read: Callable[[Session, Sequence], list],
+    projected: bool = False,
+):
+    """
+    Run ``stmt`` as one keyset page ordered by ``keys`` (unique together).
+
+    Pages are bounded by ``page.limit``; when more rows follow, the
+    X-Next-Cursor header carries the keys of the last row. With
+    ``page.stream`` every row after the cursor is sent as NDJSON, read
+    from a server-side cursor ``STREAM_CHUNK_ROWS`` at a time.
+    ``to_read`` turns a chunk of result rows into response models, or
+    into dicts when ``projected``; those bypass the endpoint's
+    response_model, which would otherwise demand every field.
+    """
+    stmt = stmt.order_by(*keys)
+    if page.cursor is not None:
+        stmt = stmt.where(tuple_(*keys) > tuple_(*_decode(page.cursor, keys)))
+
+    if page.stream:
+        return StreamingResponse(_ndjson(session, stmt, to_read), media_type="application/x-ndjson")
+
+    rows = session.exec(stmt.limit(page.limit + 1)).all()
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        response.headers["X-Next-Cursor"] = _encode(rows[-1], keys)
+    if projected:
+        return JSONResponse(jsonable_encoder(to_read(session, rows)), headers=_forwarded(response))
+    return to_read(session, rows)
+
+
+def _forwarded(response: Response) -> dict:
+    # Headers set on the injected response are dropped when an endpoint
+    # returns a Response of its own
+    cursor = response.headers.get("X-Next-Cursor")
+    return {"X-Next-Cursor": cursor} if cursor else {}
+
+
+def _ndjson(session: Session, stmt, to_read):
+    # A session of its own, so the stream doesn't depend on the request's
+    # session outliving the endpoint
+    with Session(session.get_bind()) as stream_session:
+        result = stream_session.exec(stmt.execution_options(yield_per=STREAM_CHUNK_ROWS))
+        for chunk in result.partitions():
+            yield "".join(_json_line(read) for read in to_read(stream_session, chunk))
+            stream_session.expunge_all()
+
+
+def _json_line(read) -> str:
+    if isinstance(read, dict):
+        return json.dumps(jsonable_encoder(read)) + "\n"
+    return read.model_dump_json() + "\n"
+
+
+def _encode(row, keys) -> str:
+    if isinstance(row, Row):
+        # Projected rows carry the key columns; entity rows lead with the entity
+        mapping = row._mapping
+        values = [mapping[key.key] if key.key in mapping else getattr(row[0], key.key) for key in keys]
+    else:
+        values = [getattr(row, key.key) for key in keys]
+    payload = json.dumps([v.isoformat() if isinstance(v, datetime) else str(v) if isinstance(v, UUID) else v for v in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode(cursor: str, keys) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(keys):
+            raise ValueError("wrong number of keys")
+        return [_coerce(key, value) for key, value in zip(keys, values)]
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+def _coerce(key, value):
+    sql_type = key.type.impl_instance if isinstance(key.type, TypeDecorator) else key.type
+    python_type = sql_type.python_type
+    if python_type is datetime:
+        moment = datetime.fromisoformat(value)
+        return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+    if python_type is UUID:
+        return UUID(value)
+    return python_type(value)
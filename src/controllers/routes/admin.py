@@ -1,13 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
 from models.model import User, UserRole
-<<<<<<< HEAD
 from controllers.middleware.auth import get_password_hash, get_current_user
-=======
-from auth.security import get_password_hash, get_current_user
->>>>>>> main
 from db.database import get_session
-from schemas.schema import UserCreate
+from schemas.schema import UserCreate, ModelReloadRequest
+from loaders.model_loader import ModelArtifacts
+from loaders import model_watcher
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -40,3 +39,52 @@ def create_admin_user(
     session.refresh(new_admin)
 
     return {"message":"Admin account created successfully", "user": new_admin.username}
+
+
+
+def _require_admin(current_user: User):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Access forbidden: Admins only")
+
+
+@router.get("/models", response_model=dict)
+def model_status(current_user: User = Depends(get_current_user)):
+    """Live and rollback-retained model bundles in this worker."""
+    _require_admin(current_user)
+    return ModelArtifacts.status()
+
+
+@router.post("/models/reload", response_model=dict)
+async def reload_model(
+    body: ModelReloadRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Load a model version next to the live one, smoke-test it and swap it in.
+
+    In-flight requests finish on the version they started with. The
+    replaced version stays in memory for MODEL_ROLLBACK_WINDOW_SECONDS.
+    With MODEL_CONTROL_FILE set, the other workers follow within
+    MODEL_CONTROL_POLL_SECONDS.
+    """
+    _require_admin(current_user)
+    try:
+        report = await run_in_threadpool(ModelArtifacts.reload, **body.model_dump())
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Model reload failed, live version kept: {e}")
+
+    model_watcher.publish(ModelArtifacts.current.source)
+    return {"message": f"Model version {body.version} is live", "smoke_test": report}
+
+
+@router.post("/models/rollback", response_model=dict)
+def rollback_model(current_user: User = Depends(get_current_user)):
+    """Swap the previously live model version back in."""
+    _require_admin(current_user)
+    try:
+        bundle = ModelArtifacts.rollback()
+    except LookupError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    model_watcher.publish(bundle.source)
+    return {"message": f"Rolled back to model version {bundle.version}"}
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlmodel import Session, select
 from typing import List
-from schemas.schema import UserRead, FeedbackRead, FeedbackCreate, User, UserOut
-from schemas.schema import MLModelRead, MLModelCreate
+from schemas.schema import UserRead, FeedbackRead, FeedbackCreate, UserOut
+from schemas.schema import MLModelRead, MLModelCreate, PredictionLogRead
 from db.database import get_session
 from controllers.middleware.auth import get_current_user
-from models.model import Feedback, MLModel, PredictionLog, UserRole
+from controllers.pagination import Page, Projection, paginate, project, rows_as
+from models.model import Feedback, MLModel, PredictionLog, User, UserRole
 import mlflow
 import os
 
@@ -22,11 +23,13 @@ def get_me(current_user: User = Depends(get_current_user)):
 
 @router.get("/users/", response_model=List[UserOut])
 def list_users(
+    response: Response,
+    page: Page = Depends(),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
-    List all users — Admin access only
+    List users by signup time, one keyset page at a time — Admin access only
     """
     # Check if the current user has an admin role
     roles = [ur.role.name for ur in current_user.roles]
@@ -36,9 +39,8 @@ def list_users(
             detail="Admin access required"
         )
 
-    # Fetch all users
-    users = session.exec(select(User)).all()
-    return users
+    keys = [User.created_at, User.id]
+    return paginate(session, select(User), keys, page, response, _reads(UserOut))
 
 
 # FEEDBACK
@@ -73,11 +75,15 @@ def create_feedback(
 
 @router.get("/feedback/", response_model=List[FeedbackRead])
 def list_feedback(
+    response: Response,
+    page: Page = Depends(),
+    projection: Projection = Depends(),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
-    List all feedback submitted by any user.
+    List feedback submitted by any user, one keyset page at a time;
+    ``fields=`` selects only the named columns.
     Only admin users can access this endpoint.
     """
     # Check if the current user has admin role
@@ -88,20 +94,20 @@ def list_feedback(
             detail="Admin access required"
         )
 
-    # Fetch all feedback entries
-    feedbacks = session.exec(select(Feedback)).all()
-    return feedbacks
+    return _list_table(session, Feedback, FeedbackRead, page, projection, response)
 
 
 # Admin-only endpoint
 
 @router.get("/models/", response_model=List[MLModelRead])
 def list_models(
+    response: Response,
+    page: Page = Depends(),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
-    List all ML models.
+    List ML models, one keyset page at a time.
     Only admin users can access this endpoint.
     """
     # Check if the current user has admin role
@@ -112,9 +118,7 @@ def list_models(
             detail="Admin access required"
         )
 
-    # Fetch all ML models
-    models = session.exec(select(MLModel)).all()
-    return models
+    return paginate(session, select(MLModel), [MLModel.id], page, response, _reads(MLModelRead))
 
 
 
@@ -175,12 +179,15 @@ def create_model(
     return db_model
 
 
-@router.get("/logs/", response_model=List[PredictionLog])
+@router.get("/logs/", response_model=List[PredictionLogRead])
 def list_logs(
+    response: Response,
+    page: Page = Depends(),
+    projection: Projection = Depends(),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all prediction logs (for all users). Admin only."""
+    """Get prediction logs (for all users), one keyset page at a time, optionally only ``fields=``. Admin only."""
     
     # Check if current user is admin
     if current_user.role != UserRole.ADMIN:
@@ -188,5 +195,19 @@ def list_logs(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access forbidden: Admins only"
         )
-    logs = session.exec(select(PredictionLog)).all()
-    return logs
+    return _list_table(session, PredictionLog, PredictionLogRead, page, projection, response)
+
+
+def _list_table(session, model, schema, page, projection, response):
+    """One page of ``model`` by id as ``schema``, selecting only the requested fields when ``fields=`` is given."""
+    names = projection.names(schema.model_fields)
+    to_read = _reads(schema)
+    if names is None:
+        return paginate(session, select(model), [model.id], page, response, to_read)
+    stmt = project(model, names, [model.id])
+    return paginate(session, stmt, [model.id], page, response, rows_as(names, schema), projected=True)
+
+
+def _reads(schema):
+    """``to_read`` for paginate(): validate each row into ``schema``."""
+    return lambda session, rows: [schema.model_validate(row) for row in rows]
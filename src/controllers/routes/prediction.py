@@ -1,252 +1,438 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-<<<<<<< HEAD
-=======
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import StandardScaler
->>>>>>> main
-import pandas as pd
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+import os
+import time
+from datetime import datetime, timezone
+from sqlalchemy import Text, cast, func, insert, select as sa_select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
 from schemas.churn_input import ChurnInput
-from models.model import User, Prediction, PredictionLog, MLModel, PredictionMetadata
-<<<<<<< HEAD
+from models.model import User, Prediction, PredictionInput, PredictionLog, PredictionMetadata, MLModel
 from controllers.middleware.auth import get_current_user, get_session
+from controllers.pagination import Page, Projection, as_json, paginate
+from db.instrumentation import count_round_trips
+from db import write_behind
 #from utils.ml_utils import model, train_columns, latest_version
-from ml.pipeline import preprocess_input
+from ml import inference
+from ml.inference import featurize, score, predict_one
+from ml.executor import ExecutorSaturated
 from schemas.schema import PredictionRead
-from typing import List
+from typing import List, Optional
+from uuid import UUID
 from loaders.model_loader import ModelArtifacts
+from utils.ids import new_id, new_ids
 
 router = APIRouter(prefix="/predict", tags=["Prediction"])
 
+# Upper bound on rows accepted by /predict/batch in one request
+MAX_BATCH_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "10000"))
 
-### Optimized prediction endpoint
-
-=======
-from auth.security import get_current_user, get_session
-# from app.database import get_session
-from utils.ml_utils import model, train_columns, latest_version
-from schemas.schema import PredictionRead
-from typing import List
 
-router = APIRouter(prefix="/predict", tags=["Prediction"])
+### Optimized prediction endpoint
 
->>>>>>> main
 @router.post("/", summary="Predict Customer Churn", response_model=dict)
-def predict_churn(
+async def predict_churn(
     data: ChurnInput,
+    response: Response,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
-    request: Request = None
+    request: Request = None,
+    model_version: Optional[str] = Query(None, description="Score with this model version instead of the live one"),
+    x_model_version: Optional[str] = Header(None),
 ):
-<<<<<<< HEAD
     print(f"Prediction request made by user: {current_user.username}")
 
-    df = pd.DataFrame([data.model_dump()])
+    # One bundle for the whole request, so a concurrent reload can't mix versions
+    bundle = await _select_bundle(x_model_version or model_version)
+    response.headers["X-Model-Version"] = bundle.version
+
+    # Only use the stored transforms and model; repeated payloads come from
+    # the result cache and concurrent calls may share one predict_proba
+    try:
+        y_pred, prob = await predict_one(data, bundle)
+    except ExecutorSaturated as e:
+        raise _overloaded(e)
+
+    request_ip = request.client.host if request and request.client else None
+    user_agent = request.headers.get("user-agent") if request else None
+    with count_round_trips() as db_trips:
+        if write_behind.writer is not None:
+            # Respond now; the rows are written in the background under a pre-assigned id
+            prediction_id = new_id()
+            write_behind.writer.submit([
+                _audit_record(prediction_id, current_user, bundle, data, y_pred, prob, request_ip, user_agent)
+            ])
+        else:
+            prediction_id = await run_in_threadpool(
+                _persist_prediction, session, current_user, bundle, data, y_pred, prob, request_ip, user_agent
+            )
+    response.headers["X-DB-Round-Trips"] = str(db_trips.count)
+
+    if inference.shadow is not None and bundle is ModelArtifacts.current:
+        inference.shadow.submit([data], bundle, [prob], [prediction_id])
 
-    # Only use the stored transforms and model
-    X = ModelArtifacts.fe.transform(df)
-    y_pred = ModelArtifacts.model.predict(X)[0]
-    prob = float(ModelArtifacts.model.predict_proba(X)[0, 1])
+    return {
+        "user": current_user.username,
+        "prediction": y_pred,
+        "probability": prob,
+        "prediction_id": str(prediction_id),  # exceeds 2**53; see schemas.schema.Id
+        "model_version": bundle.version,
+        "decision_threshold": bundle.threshold
+    }
 
-    # store prediction + metadata + log exactly same as before
-    prediction_record = Prediction(
-        user_id=current_user.id,
-        input_data=df.to_json(),
-        prediction=int(y_pred),
-        probability=prob
-=======
-    """
-    Protected churn prediction endpoint.
-    Only accessible with a valid JWT token.
-    """
 
-    # Log who is making the request (optional)
-    print(f"Prediction request made by user: {current_user.username}")
+def _persist_prediction(session, current_user, bundle, data, y_pred, prob, request_ip, user_agent) -> int:
+    """
+    Write the prediction and its log row with one statement.
 
-    # Convert input to DataFrame
-    input_df = pd.DataFrame([data.model_dump()])
-
-    # ----------------------------------------------------------
-    # Feature Engineering
-    # ----------------------------------------------------------
-    input_df['TotalCalls'] = input_df['InboundCalls'] + input_df['OutboundCalls']
-    input_df.drop(columns=['InboundCalls', 'OutboundCalls'], inplace=True)
-
-    # ----------------------------------------------------------
-    # Handle Missing Values
-    # ----------------------------------------------------------
-    num_features = input_df.select_dtypes(include=['int64', 'float64']).columns
-    cat_features = input_df.select_dtypes(include=['object', 'category']).columns
-
-    num_imputer = SimpleImputer(strategy='median')
-    cat_imputer = SimpleImputer(strategy='most_frequent')
-
-    input_df[num_features] = num_imputer.fit_transform(input_df[num_features])
-    input_df[cat_features] = cat_imputer.fit_transform(input_df[cat_features])
-
-    # ----------------------------------------------------------
-    # Encode Binary Features
-    # ----------------------------------------------------------
-    binary_features = ['RespondsToMailOffers', 'MadeCallToRetentionTeam']
-    binary_mapping = {'Yes': 1, 'No': 0}
-
-    for col in binary_features:
-        if col in input_df.columns:
-            input_df[col] = input_df[col].map(binary_mapping).astype(int)
-
-    # ----------------------------------------------------------
-    # One-hot Encode Low-cardinality Categorical Features
-    # ----------------------------------------------------------
-    low_card_features = ['CreditRating', 'IncomeGroup', 'Occupation', 'PrizmCode']
-    df_onehot = pd.get_dummies(input_df[low_card_features], drop_first=True)
-    input_df.drop(columns=low_card_features, inplace=True)
-    input_df = pd.concat([input_df, df_onehot], axis=1)
-
-    # Reindex columns to match training features
-    input_df = input_df.reindex(columns=train_columns, fill_value=0)
-
-    # ----------------------------------------------------------
-    # Normalize Numeric Features
-    # ----------------------------------------------------------
-    scaler = StandardScaler()
-    num_cols = input_df.select_dtypes(include=['float64', 'int64']).columns
-    input_df[num_cols] = scaler.fit_transform(input_df[num_cols])
-
-    # ----------------------------------------------------------
-    # Make Prediction
-    # ----------------------------------------------------------
-    prediction = model.predict(input_df)
-    prediction_val = model.predict(input_df)[0]
-    # probability = model.predict_proba(input_df)[0, 1]
-    probability_val = float(model.predict_proba(input_df)[0, 1])
-
-    model_version=latest_version
-
-    # -----------------------------
-    # Save Prediction in DB
-    # -----------------------------
-    prediction_record = Prediction(
-        user_id=current_user.id,
-        input_data=input_df.to_json(),
-        prediction=int(prediction_val),
-        probability=probability_val
->>>>>>> main
-    )
-    session.add(prediction_record)
-    session.commit()
-    session.refresh(prediction_record)
-
-<<<<<<< HEAD
-    # Attach model version / metadata link same way like before
-    model_record = session.exec(
-        select(MLModel).where(
-            MLModel.name == ModelArtifacts.model_name,
-            MLModel.version == ModelArtifacts.version
-        )
-    ).first()
-
-=======
-    # -----------------------------
-# Save PredictionMetadata
-# -----------------------------
-# Retrieve the MLModel record used
-    model_record = session.exec(
-        select(MLModel).where(MLModel.name == "Churn_RandomForest", MLModel.version == latest_version)
-    ).first()
-
-    if not model_record:
-        raise HTTPException(status_code=500, detail="ML model record not found in DB")
-
-    # Create PredictionMetadata
->>>>>>> main
-    metadata_record = PredictionMetadata(
-        prediction_id=prediction_record.id,
-        model_id=model_record.id
-    )
-<<<<<<< HEAD
-    session.add(metadata_record)
+    Ids are generated in process, so both rows are known up front and go
+    out as a single INSERT in one transaction.
+    """
+    prediction_id = new_id()
+    _insert_prediction_rows(session, current_user, bundle, [(prediction_id, data, y_pred, prob)], request_ip, user_agent)
     session.commit()
+    return prediction_id
 
-=======
 
-    session.add(metadata_record)
-    session.commit()
-    session.refresh(metadata_record)
-
-
-    # -----------------------------
-    # Save Prediction Log
-    # -----------------------------
->>>>>>> main
-    log_record = PredictionLog(
-        prediction_id=prediction_record.id,
-        user_id=current_user.id,
-        request_ip=request.client.host if request else None,
-        user_agent=request.headers.get("user-agent") if request else None
-    )
-    session.add(log_record)
-    session.commit()
-
-<<<<<<< HEAD
+def _insert_prediction_rows(session, current_user, bundle, rows, request_ip, user_agent, chunk_rows=1000) -> None:
+    """
+    Insert (prediction_id, input, label, probability) rows plus their log
+    rows, ``chunk_rows`` predictions per statement.
+
+    Inputs are upserted into prediction_inputs by content hash, so a
+    payload seen before costs no new input row. On PostgreSQL each
+    statement writes all three tables through data-modifying CTEs; foreign
+    keys are checked at the end of the statement, when every row is in
+    place. Other dialects (sqlite in tests) have no such CTEs and get one
+    statement per table in the same transaction.
+    """
+    postgres = session.get_bind().dialect.name == "postgresql"
+    upsert = pg_insert if postgres else sqlite_insert
+    now = datetime.now(timezone.utc)
+    for start in range(0, len(rows), chunk_rows):
+        chunk = rows[start:start + chunk_rows]
+        hashes = [row.canonical_hash() for _, row, _, _ in chunk]
+        log_ids = new_ids(len(chunk))
+        inputs = {h: row for h, (_, row, _, _) in zip(hashes, chunk)}
+        new_inputs = upsert(PredictionInput).values([
+            {"hash": h, "input_data": row.model_dump(), "created_at": now}
+            for h, row in inputs.items()
+        ]).on_conflict_do_nothing(index_elements=["hash"])
+        new_predictions = insert(Prediction).values([
+            {
+                "id": pid,
+                "user_id": current_user.id,
+                "input_hash": h,
+                "prediction": int(label),
+                "probability": float(prob),
+                "model_id": bundle.model_id,
+                "model_version": bundle.version,
+                "created_at": now,
+            }
+            for h, (pid, _, label, prob) in zip(hashes, chunk)
+        ])
+        new_logs = insert(PredictionLog).values([
+            {
+                "id": log_id,
+                "prediction_id": pid,
+                "user_id": current_user.id,
+                "request_ip": request_ip,
+                "user_agent": user_agent,
+                "timestamp": now,
+            }
+            for log_id, (pid, _, _, _) in zip(log_ids, chunk)
+        ])
+        if postgres:
+            session.execute(new_logs.add_cte(new_inputs.cte("new_inputs"), new_predictions.cte("new_predictions")))
+        else:
+            for stmt in (new_inputs, new_predictions, new_logs):
+                session.execute(stmt)
+
+
+def _audit_record(prediction_id, current_user, bundle, data, y_pred, prob, request_ip, user_agent) -> dict:
+    # JSON-native, since the write-behind queue may spill it to disk
     return {
-        "user": current_user.username,
-        "prediction": int(y_pred),
+        "id": prediction_id,
+        "user_id": str(current_user.id),
+        "input_hash": data.canonical_hash(),
+        "input_data": data.model_dump(),
+        "prediction": y_pred,
         "probability": prob,
-        "prediction_id": prediction_record.id,
-        "model_version": ModelArtifacts.version
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "model_id": bundle.model_id,
+        "model_version": bundle.version,
+        "request_ip": request_ip,
+        "user_agent": user_agent,
     }
 
 
+@router.get("/write-behind/stats", summary="Write-behind Queue Metrics", response_model=dict)
+def write_behind_stats(current_user: User = Depends(get_current_user)):
+    """Queue depth, spill size and flush latency histogram for this worker's write-behind writer."""
+    if write_behind.writer is None:
+        return {"enabled": False}
+    return {"enabled": True, **write_behind.writer.stats()}
 
-# Endpoint to list all predictions
 
-=======
-    # -----------------------------
-    # Return Response
-    # -----------------------------
+@router.get("/batcher/stats", summary="Micro-batcher Histograms", response_model=dict)
+def batcher_stats(current_user: User = Depends(get_current_user)):
+    """
+    Batch-size and queue-wait histograms for this worker's micro-batcher,
+    used to tune PREDICT_MICROBATCH_WINDOW_MS / PREDICT_MICROBATCH_MAX_ROWS.
+    """
+    if inference.batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **inference.batcher.stats()}
+
+
+@router.get("/cache/stats", summary="Prediction Cache Counters", response_model=dict)
+def cache_stats(current_user: User = Depends(get_current_user)):
+    """Hit, miss, eviction and invalidation counters for this worker's result cache."""
+    if inference.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **inference.cache.stats()}
+
+
+@router.get("/shadow/stats", summary="Shadow Scoring Counters", response_model=dict)
+def shadow_stats(current_user: User = Depends(get_current_user)):
+    """Queue depth and submitted/dropped/scored rows for this worker's shadow scorer."""
+    if inference.shadow is None:
+        return {"enabled": False}
+    return {"enabled": True, **inference.shadow.stats()}
+
+
+@router.get("/executor/stats", summary="Inference Executor Load", response_model=dict)
+def executor_stats(current_user: User = Depends(get_current_user)):
+    """Pending, admitted and rejected (503) counts for this worker's inference executor."""
+    return ModelArtifacts.executor.stats()
+
+
+
+# Batch prediction endpoint
+
+@router.post("/batch", summary="Predict Churn for a Batch of Customers", response_model=dict)
+async def predict_churn_batch(
+    data: List[ChurnInput],
+    response: Response,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+    request: Request = None,
+    model_version: Optional[str] = Query(None, description="Score with this model version instead of the live one"),
+    x_model_version: Optional[str] = Header(None),
+):
+    """
+    Score many customers with one feature transform and one predict_proba call.
+
+    Prediction and log rows are written with multi-row INSERTs
+    in a single transaction, or queued for the write-behind writer when
+    PREDICT_WRITE_BEHIND=1. Per-stage timings are reported in milliseconds.
+    """
+    if not data:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one customer")
+    if len(data) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(data)} rows (max {MAX_BATCH_SIZE})"
+        )
+
+    print(f"Batch prediction request made by user: {current_user.username} ({len(data)} rows)")
+
+    t_start = time.perf_counter()
+
+    bundle = await _select_bundle(x_model_version or model_version)
+    response.headers["X-Model-Version"] = bundle.version
+    executor = ModelArtifacts.executor
+    try:
+        with executor.admit():
+            X = await executor.run(featurize, data, bundle)
+            t_featurize = time.perf_counter()
+
+            y_pred, probs = await executor.run(score, X, bundle)
+            t_predict = time.perf_counter()
+    except ExecutorSaturated as e:
+        raise _overloaded(e)
+
+    request_ip = request.client.host if request and request.client else None
+    user_agent = request.headers.get("user-agent") if request else None
+    with count_round_trips() as db_trips:
+        if write_behind.writer is not None:
+            prediction_ids = new_ids(len(data))
+            write_behind.writer.submit([
+                _audit_record(pid, current_user, bundle, row, int(label), float(prob), request_ip, user_agent)
+                for pid, row, label, prob in zip(prediction_ids, data, y_pred, probs)
+            ])
+        else:
+            prediction_ids = await run_in_threadpool(
+                _persist_batch, session, current_user, bundle, data, y_pred, probs, request_ip, user_agent
+            )
+    t_persist = time.perf_counter()
+    response.headers["X-DB-Round-Trips"] = str(db_trips.count)
+
+    if inference.shadow is not None and bundle is ModelArtifacts.current:
+        inference.shadow.submit(data, bundle, probs, prediction_ids)
+
     return {
         "user": current_user.username,
-        "churn_prediction": int(prediction_val),
-        "churn_probability": probability_val,
-        "prediction_id": prediction_record.id,
-        "model_version": model_version
+        "model_version": bundle.version,
+        "decision_threshold": bundle.threshold,
+        "count": len(prediction_ids),
+        "results": [
+            {"prediction_id": str(pid), "prediction": int(label), "probability": float(prob)}
+            for pid, label, prob in zip(prediction_ids, y_pred, probs)
+        ],
+        "timings_ms": {
+            "featurize": round((t_featurize - t_start) * 1000, 3),
+            "predict": round((t_predict - t_featurize) * 1000, 3),
+            "persist": round((t_persist - t_predict) * 1000, 3),
+            "total": round((t_persist - t_start) * 1000, 3),
+        },
     }
 
-    # return {
-    #     "user": current_user.username,
-    #     "churn_prediction": int(prediction[0]),
-    #     "churn_probability": float(probability)
-    # }
 
+def _persist_batch(session, current_user, bundle, data, y_pred, probs, request_ip, user_agent) -> List[int]:
+    prediction_ids = new_ids(len(data))
+    _insert_prediction_rows(
+        session, current_user, bundle, list(zip(prediction_ids, data, y_pred, probs)), request_ip, user_agent
+    )
+    session.commit()
+    return prediction_ids
+
+
+async def _select_bundle(version: Optional[str]):
+    """Live bundle, or the requested version (X-Model-Version / ?model_version=), loaded on first use."""
+    try:
+        if version is None:
+            return ModelArtifacts.bundle()
+        return await run_in_threadpool(ModelArtifacts.get, version)
+    except RuntimeError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Model is not loaded",
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Model version {version} could not be loaded: {e}",
+        )
+
+
+def _overloaded(e: ExecutorSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Prediction capacity exhausted, retry later",
+        headers={"Retry-After": str(e.retry_after)},
+    )
 
 
-# -----------------------------
 # Endpoint to list all predictions
-# -----------------------------
->>>>>>> main
+
+class PredictionFilters:
+    """Optional filters for /predict/predictions/; all given filters must match."""
+
+    def __init__(
+        self,
+        user_id: Optional[UUID] = Query(None, description="Predictions requested by this user"),
+        model_id: Optional[int] = Query(None, description="Predictions made by this model"),
+        model_version: Optional[str] = Query(None, description="Predictions made by this model version"),
+        created_from: Optional[datetime] = Query(None, description="Created at or after (UTC if no offset)"),
+        created_to: Optional[datetime] = Query(None, description="Created before (UTC if no offset)"),
+        min_probability: Optional[float] = Query(None, ge=0, le=1),
+        max_probability: Optional[float] = Query(None, ge=0, le=1),
+        prediction: Optional[int] = Query(None, ge=0, le=1, description="Predicted label"),
+    ):
+        self.user_id = user_id
+        self.model_id = model_id
+        self.model_version = model_version
+        self.created_from = _utc(created_from)
+        self.created_to = _utc(created_to)
+        self.min_probability = min_probability
+        self.max_probability = max_probability
+        self.prediction = prediction
+
+    def apply(self, stmt):
+        # Each equality filter leads a (column, created_at, id) index, so the
+        # created_at range and the keyset order are one index range scan
+        if self.user_id is not None:
+            stmt = stmt.where(Prediction.user_id == self.user_id)
+        if self.model_id is not None:
+            stmt = stmt.where(Prediction.model_id == self.model_id)
+        if self.model_version is not None:
+            stmt = stmt.where(Prediction.model_version == self.model_version)
+        if self.created_from is not None:
+            stmt = stmt.where(Prediction.created_at >= self.created_from)
+        if self.created_to is not None:
+            stmt = stmt.where(Prediction.created_at < self.created_to)
+        if self.min_probability is not None:
+            stmt = stmt.where(Prediction.probability >= self.min_probability)
+        if self.max_probability is not None:
+            stmt = stmt.where(Prediction.probability <= self.max_probability)
+        if self.prediction is not None:
+            stmt = stmt.where(Prediction.prediction == self.prediction)
+        return stmt
+
+
+def _utc(moment: Optional[datetime]) -> Optional[datetime]:
+    if moment is None or moment.tzinfo is not None:
+        return moment
+    return moment.replace(tzinfo=timezone.utc)
+
+
+# Keyset order of prediction listings: creation time, ties broken by id
+PREDICTION_KEYS = [Prediction.created_at, Prediction.id]
+
+
 @router.get("/predictions/", response_model=List[PredictionRead])
 def list_predictions(
+    response: Response,
+    page: Page = Depends(),
+    filters: PredictionFilters = Depends(),
+    projection: Projection = Depends(),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
-    List all predictions in the database.
+    Search predictions by user, model, model version, creation time, probability
+    and label, in creation order, one keyset page at a time, or all of
+    them as NDJSON with ``stream=true``. ``fields=id,probability,...``
+    selects only those columns, e.g. to skip input_data.
     
     Authentication is required, but predictions are not user-specific.
     """
-    predictions = session.exec(select(Prediction)).all()
-    return predictions
+    return _list_predictions(session, filters.apply, page, projection, response)
 
 
-<<<<<<< HEAD
+@router.get("/predictions/by-input/{input_hash}", response_model=List[PredictionRead])
+def list_predictions_for_input(
+    input_hash: str,
+    response: Response,
+    page: Page = Depends(),
+    projection: Projection = Depends(),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List every prediction made for one exact input, identified by
+    ChurnInput.canonical_hash().
+    """
+    where = lambda stmt: stmt.where(Prediction.input_hash == input_hash)
+    return _list_predictions(session, where, page, projection, response)
+
+
+def _list_predictions(session, where, page, projection, response):
+    names = projection.names(PredictionRead.model_fields)
+    if names is None:
+        return paginate(session, where(_prediction_query()), PREDICTION_KEYS, page, response, _to_read)
+    return paginate(
+        session, where(_projected_query(names)), PREDICTION_KEYS, page, response, _projected_reads(names), projected=True
+    )
+
 
-# Endpoint: Get a single prediction
 
-=======
-# -----------------------------
 # Endpoint: Get a single prediction
-# -----------------------------
->>>>>>> main
+
 @router.get("/predictions/{prediction_id}", response_model=PredictionRead)
 def get_prediction(
     prediction_id: int,
@@ -258,10 +444,89 @@ def get_prediction(
     
     Authentication is required, but predictions are not user-specific.
     """
-    prediction = session.get(Prediction, prediction_id)
-    if not prediction:
+    row = session.exec(_prediction_query().where(Prediction.id == prediction_id)).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Prediction not found")
-    return prediction
+    return _to_read(session, [row])[0]
+
+
+def _prediction_query():
+    """Predictions with their shared input, as (Prediction, input JSON text) rows."""
+    return (
+        select(Prediction, PredictionInput.input_data)
+        .outerjoin(PredictionInput, PredictionInput.hash == Prediction.input_hash)
+    )
+
+
+def _projected_query(names):
+    """
+    SELECT of only ``names`` plus the keyset columns. prediction_inputs is
+    only joined when input_data is asked for, so large inputs are never
+    read otherwise.
+    """
+    columns = []
+    for name in dict.fromkeys([*names, *(key.key for key in PREDICTION_KEYS)]):
+        if name == "input_data":
+            shared = func.coalesce(Prediction.input_data, PredictionInput.input_data)
+            columns.append(cast(shared, Text).label("input_data"))
+        else:
+            columns.append(getattr(Prediction, name))
+    stmt = sa_select(*columns).select_from(Prediction)
+    if "input_data" in names:
+        stmt = stmt.outerjoin(PredictionInput, PredictionInput.hash == Prediction.input_hash)
+    return stmt
+
+
+def _to_read(session, rows) -> List[PredictionRead]:
+    """
+    Read models for ``_prediction_query`` rows, taking model_id/model_version
+    from predictionmetadata for rows an older release wrote without them.
+    """
+    reads = []
+    for prediction, shared_input in rows:
+        read = PredictionRead.model_validate(prediction)
+        if read.input_data is None:
+            read.input_data = shared_input
+        reads.append(read)
+    legacy = _legacy_models(session, [r.id for r in reads if r.model_id is None])
+    for r in reads:
+        if r.id in legacy:
+            r.model_id, r.model_version = legacy[r.id]
+    return reads
+
+
+def _projected_reads(names):
+    """``to_read`` for ``_projected_query`` rows: dicts of the requested fields."""
+    model_field = next((n for n in ("model_id", "model_version") if n in names), None)
+
+    def to_read(session, rows) -> List[dict]:
+        reads = [{name: row._mapping[name] for name in names} for row in rows]
+        if model_field is not None:
+            legacy = _legacy_models(session, [row.id for row in rows if row._mapping[model_field] is None])
+            for row, read in zip(rows, reads):
+                if row.id in legacy:
+                    model_id, version = legacy[row.id]
+                    if "model_id" in read:
+                        read["model_id"] = model_id
+                    if "model_version" in read:
+                        read["model_version"] = version
+        return [as_json(PredictionRead, read) for read in reads]
+
+    return to_read
+
+
+def _legacy_models(session, prediction_ids) -> dict:
+    """prediction_id -> (model_id, version) from predictionmetadata."""
+    if not prediction_ids:
+        return {}
+    return {
+        prediction_id: (model_id, version)
+        for prediction_id, model_id, version in session.exec(
+            select(PredictionMetadata.prediction_id, MLModel.id, MLModel.version)
+            .join(MLModel, MLModel.id == PredictionMetadata.model_id)
+            .where(PredictionMetadata.prediction_id.in_(prediction_ids))
+        )
+    }
 
 
 
@@ -0,0 +1,43 @@
+import contextvars
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+_current = contextvars.ContextVar("db_round_trips", default=None)
+
+
+class RoundTrips:
+    """Statements and COMMITs/ROLLBACKs sent while counting was active."""
+
+    def __init__(self):
+        self.count = 0
+
+
+def instrument(engine) -> None:
+    """Count every database round trip made through ``engine`` into the active counter."""
+
+    def bump(*args, **kwargs):
+        counter = _current.get()
+        if counter is not None:
+            counter.count += 1
+
+    # No "begin": the driver sends BEGIN along with the first statement of
+    # a transaction, not as a round trip of its own
+    for name in ("before_cursor_execute", "commit", "rollback"):
+        event.listen(engine, name, bump)
+
+
+@contextmanager
+def count_round_trips():
+    """
+    Count round trips made in this context, including threadpool calls it spawns.
+
+    ``run_in_threadpool`` copies the current context into the worker thread,
+    so the counter set here is the one the thread sees.
+    """
+    counter = RoundTrips()
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
@@ -0,0 +1,33 @@
+import json
+
+from sqlalchemy import JSON, Text, cast
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
+
+
+class JSONText(TypeDecorator):
+    """
+    JSONB column that reads back as JSON text.
+
+    Values are stored as JSONB, so they are queryable with the JSON
+    operators. Selects cast the column to text, so the driver hands back
+    the string as is and nothing is parsed unless a caller asks for it
+    (``json.loads``). Binds accept a dict or a JSON string. Other
+    databases (SQLite in tests) get a plain JSON column.
+    """
+
+    impl = JSONB
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(JSON())
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, (str, bytes)):
+            return json.loads(value)
+        return value
+
+    def column_expression(self, column):
+        return cast(column, Text)
@@ -0,0 +1,297 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from ml.batcher import Histogram
+from utils.ids import new_ids
+
+
+class WriteBehindWriter:
+    """
+    Buffers records and writes them in large batches on a background thread.
+
+    ``submit`` never waits for the database or the disk. Records go to a
+    bounded queue; when it is full they are handed to a spill thread, and
+    when a flush fails the writer thread spills the batch itself. Either
+    way they are appended to this process's ``spill-<pid>.jsonl`` in
+    ``spill_dir``. Spill files are replayed
+    once flushing works again, including ones left behind by dead workers,
+    so ``flush`` must be idempotent (records carry their ids). Records must
+    be JSON-serializable, since they may round-trip through a spill file.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[dict]], None],
+        spill_dir: str,
+        max_queue: int = 10_000,
+        batch_rows: int = 500,
+        flush_interval_ms: float = 200.0,
+        retry_seconds: float = 5.0,
+    ):
+        self.flush = flush
+        self.spill_dir = Path(spill_dir)
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.retry_seconds = retry_seconds
+        self.flush_ms = Histogram([1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000])
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        # Overflow from submit(), written to disk off the caller's thread
+        self._overflow: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._spill_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._spill_thread: Optional[threading.Thread] = None
+        self.flushed = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def spill_path(self) -> Path:
+        return self.spill_dir / f"spill-{os.getpid()}.jsonl"
+
+    def submit(self, records: List[dict]) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._start()
+        for i, record in enumerate(records):
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self._overflow.put(records[i:])
+                return
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush what is buffered (spilling it if that fails) and stop the threads."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._spill_thread is not None:
+            self._spill_thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "overflow_depth": self._overflow.qsize(),
+            "max_queue": self._queue.maxsize,
+            "flushed": self.flushed,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "failures": self.failures,
+            "spill_bytes": sum(p.stat().st_size for p in self._spill_files()),
+            "last_error": self.last_error,
+            "flush_ms": self.flush_ms.snapshot(),
+        }
+
+    def _start(self) -> None:
+        # Started on first use so a preloading master never owns the thread
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        if self._spill_thread is None or not self._spill_thread.is_alive():
+            self._spill_thread = threading.Thread(target=self._spill_overflow, name="write-behind-spill", daemon=True)
+            self._spill_thread.start()
+
+    def _spill_overflow(self) -> None:
+        while True:
+            try:
+                records = self._overflow.get(timeout=0.1)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            self._spill(records)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch and not self._write(batch):
+                self._spill(batch)
+                if self._stopping.is_set():
+                    self._spill(self._drain())
+                    return
+                self._stopping.wait(self.retry_seconds)
+                continue
+            if self._spill_files() and not self._replay() and not self._stopping.is_set():
+                self._stopping.wait(self.retry_seconds)
+            if self._stopping.is_set() and self._queue.empty():
+                return
+
+    def _collect(self) -> List[dict]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_rows:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self) -> List[dict]:
+        records = []
+        while True:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                return records
+
+    def _write(self, batch: List[dict]) -> bool:
+        started = time.perf_counter()
+        try:
+            self.flush(batch)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            print(f"Write-behind flush of {len(batch)} records failed: {e}")
+            return False
+        self.flush_ms.observe((time.perf_counter() - started) * 1000)
+        self.flushed += len(batch)
+        self.last_error = None
+        return True
+
+    def _spill(self, records: List[dict]) -> None:
+        with self._spill_lock:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.spill_path, "a") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        self.spilled += len(records)
+
+    def _spill_files(self) -> List[Path]:
+        if not self.spill_dir.is_dir():
+            return []
+        return sorted(self.spill_dir.glob("spill-*.jsonl")) + sorted(self.spill_dir.glob("replay-*.jsonl"))
+
+    def _claim(self) -> List[Path]:
+        """
+        Rename replayable files to ``replay-<our pid>-...`` and return ours.
+
+        Our own spill file is moved aside under the spill lock so new spills
+        start a fresh file; other workers' files are only taken once their
+        process is gone, and the atomic rename makes sure only one worker
+        takes each.
+        """
+        me = os.getpid()
+        for path in self._spill_files():
+            owner = int(path.stem.split("-")[1])
+            if owner != me and _alive(owner):
+                continue
+            if path.name.startswith("replay-") and owner == me:
+                continue
+            target = self.spill_dir / f"replay-{me}-{time.time_ns()}.jsonl"
+            try:
+                if owner == me:
+                    with self._spill_lock:
+                        os.replace(path, target)
+                else:
+                    os.rename(path, target)
+            except FileNotFoundError:
+                pass  # claimed by another worker
+        return sorted(self.spill_dir.glob(f"replay-{me}-*.jsonl"))
+
+    def _replay(self) -> bool:
+        for path in self._claim():
+            with open(path) as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            for start in range(0, len(records), self.batch_rows):
+                if not self._write(records[start:start + self.batch_rows]):
+                    return False  # keep the file and retry later
+                self.replayed += min(self.batch_rows, len(records) - start)
+            os.unlink(path)
+            print(f"Replayed {len(records)} spilled records from {path.name}")
+        return True
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def flush_predictions(records: List[dict]) -> None:
+    """
+    Insert buffered predictions with their log rows in one transaction.
+
+    Predictions already present (a replay after a partial failure) are skipped
+    together with their child rows, so flushing the same records twice is safe.
+    """
+    from sqlalchemy.dialects.postgresql import insert
+    from db.database import engine
+    from models.model import Prediction, PredictionInput, PredictionLog
+
+    with engine.begin() as conn:
+        # Inputs are shared by content hash; spill files from before
+        # prediction_inputs carry the input inline instead
+        inputs = {r["input_hash"]: r for r in records if r.get("input_hash")}
+        if inputs:
+            conn.execute(
+                insert(PredictionInput).on_conflict_do_nothing(index_elements=["hash"]),
+                [
+                    {"hash": h, "input_data": r["input_data"], "created_at": datetime.fromisoformat(r["created_at"])}
+                    for h, r in inputs.items()
+                ],
+            )
+        inserted = set(conn.execute(
+            insert(Prediction)
+            .on_conflict_do_nothing(index_elements=["id"])
+            .returning(Prediction.id),
+            [
+                {
+                    "id": r["id"],
+                    "user_id": uuid.UUID(r["user_id"]),
+                    "input_hash": r.get("input_hash"),
+                    "input_data": None if r.get("input_hash") else r["input_data"],
+                    "prediction": r["prediction"],
+                    "probability": r["probability"],
+                    "model_id": r["model_id"],
+                    "model_version": r.get("model_version"),  # absent in older spill files
+                    "created_at": datetime.fromisoformat(r["created_at"]),
+                }
+                for r in records
+            ],
+        ).scalars())
+        records = [r for r in records if r["id"] in inserted]
+        if not records:
+            return
+
+        conn.execute(insert(PredictionLog), [
+            {
+                "id": log_id,
+                "prediction_id": r["id"],
+                "user_id": uuid.UUID(r["user_id"]),
+                "request_ip": r["request_ip"],
+                "user_agent": r["user_agent"],
+                "timestamp": datetime.fromisoformat(r["created_at"]),
+            }
+            for log_id, r in zip(new_ids(len(records)), records)
+        ])
+
+
+# Write-behind persistence for /predict/: respond right after scoring and
+# write rows in the background. Enabled per worker with PREDICT_WRITE_BEHIND=1.
+writer = (
+    WriteBehindWriter(
+        flush_predictions,
+        spill_dir=os.getenv("PREDICT_WRITE_BEHIND_SPILL_DIR", "/tmp/prediction_spill"),
+        max_queue=int(os.getenv("PREDICT_WRITE_BEHIND_MAX_QUEUE", "10000")),
+        batch_rows=int(os.getenv("PREDICT_WRITE_BEHIND_BATCH_ROWS", "500")),
+        flush_interval_ms=float(os.getenv("PREDICT_WRITE_BEHIND_FLUSH_MS", "200")),
+    )
+    if os.getenv("PREDICT_WRITE_BEHIND", "0") == "1"
+    else None
+)
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional
+
+
+class ArtifactCache:
+    """
+    Local, content-addressed store for downloaded artifacts.
+
+    Files are keyed by (blob path, content version), where the version is the
+    blob's Content-MD5 or ETag, so a changed blob never hits a stale entry.
+    Entries are written to a temp file and renamed into place, which keeps
+    concurrent workers from ever reading a partial file. When the cache
+    grows past ``max_bytes`` the least recently used files are evicted.
+    """
+
+    def __init__(self, root: str, max_bytes: Optional[int] = None):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["ArtifactCache"]:
+        """Cache configured by ARTIFACT_CACHE_DIR / ARTIFACT_CACHE_MAX_BYTES, or None."""
+        root = os.getenv("ARTIFACT_CACHE_DIR")
+        if not root:
+            return None
+        max_bytes = os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(2 * 1024 ** 3))
+        return cls(root, max_bytes=int(max_bytes))
+
+    def path_for(self, blob_path: str, version: str) -> Path:
+        key = hashlib.sha256(f"{blob_path}\0{version}".encode()).hexdigest()
+        return self.root / f"{key}{Path(blob_path).suffix}"
+
+    def get(self, blob_path: str, version: str) -> Optional[str]:
+        path = self.path_for(blob_path, version)
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except FileNotFoundError:
+            return None
+        return str(path)
+
+    def put(self, blob_path: str, version: str, write: Callable) -> str:
+        """Create the entry by calling ``write(file)``, then publish it atomically."""
+        path = self.path_for(blob_path, version)
+        atomic_write(path, write)
+        self.evict(keep=path)
+        return str(path)
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        if self.max_bytes is None:
+            return
+        entries = []
+        for p in self.root.iterdir():
+            if p.name.startswith(".tmp-") or not p.is_file():
+                continue
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue  # removed by another worker
+            entries.append((st.st_mtime, st.st_size, p))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def atomic_write(path, write: Callable) -> str:
+    """Write through ``write(file)`` into a temp file beside ``path`` and rename it over."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return str(path)
@@ -0,0 +1,93 @@
+import os
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+
+
+class ArtifactStore(ABC):
+    """Where model artifacts live; ``fetch`` makes one available as a local file."""
+
+    @abstractmethod
+    def fetch(self, path: str, local_path: str) -> str:
+        """Return a local file path holding the artifact at ``path``."""
+
+
+class LocalArtifactStore(ArtifactStore):
+    """
+    Artifacts already on the local filesystem (``file://`` URIs).
+
+    Files are read in place; ``local_path`` is ignored unless ``copy`` is set,
+    e.g. when the source sits on a network mount that may change under us.
+    """
+
+    def __init__(self, copy: bool = False):
+        self.copy = copy
+
+    def fetch(self, path: str, local_path: str) -> str:
+        if not Path(path).is_file():
+            raise FileNotFoundError(f"Artifact not found: {path}")
+        if not self.copy:
+            return path
+        Path(local_path).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, local_path)
+        return local_path
+
+
+class AzureBlobArtifactStore(ArtifactStore):
+    """Artifacts in an Azure Blob container, downloaded through ``BlobLoader``."""
+
+    def __init__(self, container_name: Optional[str] = None, loader=None):
+        self.container_name = container_name
+        self._loader = loader
+        self._lock = threading.Lock()
+
+    @property
+    def loader(self):
+        # Imported lazily so local-only deployments don't need the Azure SDK
+        with self._lock:
+            if self._loader is None:
+                from .blob_loader import BlobLoader
+                self._loader = BlobLoader(container_name=self.container_name)
+        return self._loader
+
+    def fetch(self, path: str, local_path: str) -> str:
+        return self.loader.download(path, local_path)
+
+
+_azure_stores = {}
+
+
+def resolve(uri: str) -> Tuple[ArtifactStore, str]:
+    """
+    Map an artifact URI to its store and the path within that store.
+
+    - ``file:///abs/path`` or ``file://rel/path``: local filesystem
+    - ``az://container/path`` (or ``azure://``): Azure Blob Storage
+    - no scheme: a blob path in AZURE_STORAGE_CONTAINER_NAME, as the
+      ``*_BLOB_PATH`` settings have always been interpreted
+    """
+    parsed = urlparse(uri)
+    if parsed.scheme == "file":
+        path = parsed.netloc + parsed.path
+        return LocalArtifactStore(copy=os.getenv("ARTIFACT_LOCAL_COPY", "0") == "1"), path
+    if parsed.scheme in ("az", "azure"):
+        return _azure_store(parsed.netloc or None), parsed.path.lstrip("/")
+    if parsed.scheme == "":
+        return _azure_store(None), uri
+    raise ValueError(f"Unsupported artifact URI scheme: {parsed.scheme!r} in {uri}")
+
+
+def _azure_store(container_name: Optional[str]) -> AzureBlobArtifactStore:
+    # One store (and blob client) per container, shared by concurrent fetches
+    store = _azure_stores.get(container_name)
+    if store is None:
+        store = _azure_stores[container_name] = AzureBlobArtifactStore(container_name)
+    return store
+
+
+def fetch(uri: str, local_path: str) -> str:
+    store, path = resolve(uri)
+    return store.fetch(path, local_path)
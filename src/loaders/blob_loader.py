@@ -1,19 +1,94 @@
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceModifiedError
 from azure.storage.blob import BlobServiceClient
-from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import os
+from .artifact_cache import ArtifactCache, atomic_write
 
 class BlobLoader:
-    def __init__(self):
-        self.conn_str = os.environ["AZURE_STORAGE_CONNECTION_STRING"]
-        self.container_name = os.environ["AZURE_STORAGE_CONTAINER_NAME"]
+    def __init__(self, client=None, container_name=None, cache=None):
+        if client is None:
+            self.conn_str = os.environ["AZURE_STORAGE_CONNECTION_STRING"]
+            client = BlobServiceClient.from_connection_string(self.conn_str)
+        self.container_name = container_name or os.environ["AZURE_STORAGE_CONTAINER_NAME"]
 
-        self.client = BlobServiceClient.from_connection_string(self.conn_str)
+        self.client = client
+        # Local content-addressed cache; None when ARTIFACT_CACHE_DIR is unset
+        self.cache = cache if cache is not None else ArtifactCache.from_env()
+
+        # Ranged download tuning
+        self.concurrency = int(os.getenv("BLOB_DOWNLOAD_CONCURRENCY", "4"))
+        self.chunk_size = int(os.getenv("BLOB_DOWNLOAD_CHUNK_BYTES", str(8 * 1024 * 1024)))
 
     def download(self, blob_path: str, local_path: str):
+        """
+        Download a blob and return the local file path to read it from.
+
+        With a cache configured, the blob's Content-MD5/ETag is checked first
+        and a cached copy is returned without downloading; the returned path
+        is then inside the cache directory rather than ``local_path``.
+        """
         container = self.client.get_container_client(self.container_name)
         blob = container.get_blob_client(blob_path)
-        Path(local_path).parent.mkdir(parents=True, exist_ok=True)
-        with open(local_path, "wb") as f:
-            data = blob.download_blob().readall()
-            f.write(data)
-        return local_path
+        props = blob.get_blob_properties()
+
+        def write(f):
+            self._stream(blob, props, f, blob_path)
+
+        if self.cache is None:
+            return atomic_write(local_path, write)
+
+        version = content_version(props)
+        cached = self.cache.get(blob_path, version)
+        if cached:
+            print(f"Artifact cache hit: {blob_path}")
+            return cached
+        return self.cache.put(blob_path, version, write)
+
+    def _stream(self, blob, props, f, blob_path: str) -> str:
+        """
+        Fetch the blob as byte ranges on ``concurrency`` threads and write them
+        in order as they arrive, hashing on the way.
+
+        At most ``2 * concurrency`` chunks are held in memory at once. Every
+        range is pinned to the ETag in ``props``, so an overwrite halfway
+        through fails the download instead of mixing two versions; the MD5
+        is also checked against the blob's Content-MD5 when it has one.
+        """
+        size = props.size
+        ranges = [(offset, min(self.chunk_size, size - offset)) for offset in range(0, size, self.chunk_size)]
+
+        def fetch(offset, length):
+            return blob.download_blob(
+                offset=offset, length=length, etag=props.etag, match_condition=MatchConditions.IfNotModified
+            ).readall()
+
+        digest = hashlib.md5()
+        with ThreadPoolExecutor(max_workers=max(1, self.concurrency)) as pool:
+            todo = iter(ranges)
+            window = deque(pool.submit(fetch, *r) for _, r in zip(range(2 * self.concurrency), todo))
+            while window:
+                try:
+                    data = window.popleft().result()
+                except ResourceModifiedError:
+                    raise IOError(f"{blob_path} was modified while downloading")
+                digest.update(data)
+                f.write(data)
+                nxt = next(todo, None)
+                if nxt is not None:
+                    window.append(pool.submit(fetch, *nxt))
+
+        expected = props.content_settings.content_md5 if props.content_settings else None
+        if expected and digest.digest() != bytes(expected):
+            raise IOError(f"MD5 mismatch while downloading {blob_path}")
+        return digest.hexdigest()
+
+
+def content_version(props) -> str:
+    """Content-MD5 when the blob has one (true content address), else its ETag."""
+    md5 = props.content_settings.content_md5 if props.content_settings else None
+    if md5:
+        return "md5-" + bytes(md5).hex()
+    return "etag-" + props.etag.strip('"')
@@ -1,44 +1,564 @@
+import gc
 import pickle
+import re
+import threading
+import time
 import joblib
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from .blob_loader import BlobLoader
+from typing import Any, Optional
+from . import artifact_store
 import os
 from dotenv import load_dotenv
+from ml.feature_plan import FeaturePlan
+from ml.parity import check_feature_parity, probe_inputs
+from ml.tree_engine import CompiledForest, parity_probe
+from ml.executor import InferenceExecutor
+from utils.memory import memory_usage
 
 
 
 
 load_dotenv()
 
+
+# Versions callers may ask for: they name files and fill URI templates, so
+# no path separators and no leading dot
+VERSION_PATTERN = re.compile(r"^\w[\w.-]{0,63}$")
+
+
+class LoadBackoff(Exception):
+    """A model version failed to load recently and is not retried yet."""
+
+
+@dataclass(frozen=True, eq=False)
+class ArtifactBundle:
+    """
+    Everything needed to score with one model version.
+
+    Bundles are never mutated: a reload builds a new one and swaps it in,
+    so a request that grabbed a bundle finishes on that version even if
+    another one goes live halfway through.
+    """
+    name: str
+    version: str
+    # Id of the MLModel row predictions made with this bundle point at
+    model_id: int
+    model: Any
+    fe: Any
+    # Object whose predict_proba serves requests: the sklearn model itself,
+    # or its compiled array form when MODEL_ENGINE=compiled
+    scorer: Any
+    threshold: float
+    feature_dtype: np.dtype
+    # Pandas-free featurization; only set once it matches fe.transform
+    plan: Optional[FeaturePlan] = None
+    # Arguments build() was called with, so other workers can load the same thing
+    source: dict = field(default_factory=dict)
+    # Size of the artifact files, used as the bundle's memory footprint
+    nbytes: int = 0
+    loaded_at: float = field(default_factory=time.time)
+
+    @property
+    def key(self) -> tuple:
+        return (self.name, self.version)
+
+    def describe(self) -> dict:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "threshold": self.threshold,
+            "model_id": self.model_id,
+            "engine": type(self.scorer).__name__,
+            "feature_plan": self.plan is not None,
+            "nbytes": self.nbytes,
+            "loaded_at": self.loaded_at,
+        }
+
+
+def check_version(version: str) -> None:
+    """Raise LookupError for version strings that cannot name a model version."""
+    if not VERSION_PATTERN.match(version):
+        raise LookupError(f"Invalid model version: {version!r}")
+
+
 class ModelArtifacts:
-    model = None
-    fe = None
+    # Live bundle; read once per request through bundle()
+    current: Optional[ArtifactBundle] = None
+    # Bundle replaced by the last reload, kept for ROLLBACK_WINDOW seconds
+    previous: Optional[ArtifactBundle] = None
+    previous_until = 0.0
+    rollback_window = float(os.getenv("MODEL_ROLLBACK_WINDOW_SECONDS", "600"))
+    _swap_lock = threading.Lock()
+    _reload_lock = threading.Lock()  # one candidate build at a time
+
+    # Every loaded bundle by (name, version), least recently used first.
+    # The live and rollback bundles are pinned; others are evicted once
+    # the total goes over MODEL_REGISTRY_MAX_BYTES.
+    bundles: "OrderedDict[tuple, ArtifactBundle]" = OrderedDict()
+    max_bytes = int(os.getenv("MODEL_REGISTRY_MAX_BYTES", str(2 * 1024 ** 3)))
+    # Where to find versions that are not loaded yet: registered sources,
+    # then the MODEL_URI_TEMPLATE / FE_URI_TEMPLATE / FEATURE_PLAN_URI_TEMPLATE
+    # patterns with {version} filled in
+    sources: dict = {}
+    _load_locks: dict = {}
+    evictions = 0
+    # Versions whose on-demand load failed, by (name, version): (failures,
+    # retry_at, error). They are skipped until retry_at, which backs off
+    # from MODEL_LOAD_RETRY_SECONDS, doubling up to MODEL_LOAD_RETRY_MAX_SECONDS,
+    # or until a new source is registered or the control file changes.
+    failed_loads: dict = {}
+    # Oldest failures are forgotten beyond this many versions
+    max_failed_loads = 1000
+    load_retry_seconds = float(os.getenv("MODEL_LOAD_RETRY_SECONDS", "30"))
+    load_retry_max_seconds = float(os.getenv("MODEL_LOAD_RETRY_MAX_SECONDS", "600"))
+
+    feature_dtype = np.dtype(os.getenv("FEATURE_DTYPE", "float64"))
+    engine = os.getenv("MODEL_ENGINE", "sklearn")
+
+    # Dedicated pool for featurization + scoring, with a bounded backlog
+    executor = InferenceExecutor(
+        max_workers=int(os.getenv("INFERENCE_WORKERS", "2")),
+        max_pending=int(os.getenv("INFERENCE_MAX_PENDING", "64")),
+        retry_after=int(os.getenv("INFERENCE_RETRY_AFTER_SECONDS", "1")),
+    )
+
+    # Identifies the MLModel row predictions are attributed to
+    model_name = os.getenv("MODEL_NAME", "Churn_RandomForest")
+    version = os.getenv("MODEL_VERSION", "1")
+
+    # Churn probability above which a customer is labelled as churning.
+    # Tuned per model version to move the operating point without retraining.
+    threshold = float(os.getenv("MODEL_DECISION_THRESHOLD", "0.5"))
 
     @classmethod
     def load(cls):
-        if cls.model and cls.fe:
+        if cls.current is not None:
             return  # already loaded
 
-        loader = BlobLoader()
+        cls.current = cls._remember(cls.build(
+            version=cls.version,
+            model_uri=os.getenv("MODEL_URI") or os.getenv(
+                "MODEL_BLOB_PATH",
+                "mlflow/1/models/m-1294491f521b479d96686a0db03633ee/artifacts/model.pkl"
+            ),
+            fe_uri=os.getenv("FE_URI") or os.getenv(
+                "FE_BLOB_PATH",
+                "mlflow/1/77419d51036c49b4940e3eadf9f048a3/artifacts/mlflow-artifacts/feature_engineer.joblib"
+            ),
+            plan_uri=os.getenv("FEATURE_PLAN_URI") or os.getenv("FEATURE_PLAN_BLOB_PATH"),
+        ))
 
-        # Azure blob paths from env vars
-        model_blob = os.getenv(
-            "MODEL_BLOB_PATH",
-            "mlflow/1/models/m-1294491f521b479d96686a0db03633ee/artifacts/model.pkl"
-        )
-        fe_blob = os.getenv(
-            "FE_BLOB_PATH",
-            "mlflow/1/77419d51036c49b4940e3eadf9f048a3/artifacts/mlflow-artifacts/feature_engineer.joblib"
+    @classmethod
+    def bundle(cls) -> ArtifactBundle:
+        """The live bundle; grab it once per request and use it throughout."""
+        bundle = cls.current
+        if bundle is None:
+            raise RuntimeError("Model artifacts are not loaded")
+        return bundle
+
+    @classmethod
+    def get(cls, version: Optional[str] = None, name: Optional[str] = None) -> ArtifactBundle:
+        """
+        Bundle for ``version``, loading it on first use.
+
+        ``None`` (or the live version) returns the live bundle. Blocks while
+        a version is fetched, so call it off the event loop. Raises LookupError
+        for versions with no registered source and no URI template, and
+        LoadBackoff for versions that failed to load and are not retried yet.
+        """
+        live = cls.bundle()
+        name = name or live.name
+        if version is None or (name, version) == live.key:
+            return live
+
+        check_version(version)
+        key = (name, version)
+        with cls._swap_lock:
+            bundle = cls.bundles.get(key)
+            if bundle is not None:
+                cls.bundles.move_to_end(key)
+                return bundle
+            cls._check_backoff(key)
+            lock = cls._load_locks.setdefault(key, threading.Lock())
+
+        # Concurrent first requests for a version share one load
+        try:
+            with lock:
+                with cls._swap_lock:
+                    bundle = cls.bundles.get(key)
+                    if bundle is None:
+                        # The load this request waited on may just have failed
+                        cls._check_backoff(key)
+                if bundle is None:
+                    source = cls._source_for(name, version)
+                    try:
+                        bundle = cls.build(name=name, **source)
+                        smoke_test(bundle, reference=live)
+                    except Exception as e:
+                        cls._load_failed(key, e)
+                        raise
+                    cls._remember(bundle)
+                    with cls._swap_lock:
+                        cls.failed_loads.pop(key, None)
+                    print(f"Model version {version} loaded on demand ({bundle.nbytes} bytes)")
+        finally:
+            # Versions come from request headers; never keep a lock per version
+            with cls._swap_lock:
+                cls._load_locks.pop(key, None)
+        return bundle
+
+    @classmethod
+    def register(cls, version: str, model_uri: str, fe_uri: str, plan_uri: Optional[str] = None,
+                 threshold: Optional[float] = None, name: Optional[str] = None) -> None:
+        """Record where a version's artifacts live; it is loaded on first use."""
+        name = name or cls.model_name
+        with cls._swap_lock:
+            cls.failed_loads.pop((name, version), None)
+        cls.sources[(name, version)] = {
+            "version": version,
+            "model_uri": model_uri,
+            "fe_uri": fe_uri,
+            "plan_uri": plan_uri,
+            "threshold": threshold,
+        }
+
+    @classmethod
+    def forget_failed_loads(cls) -> None:
+        """Retry every version that failed to load on its next use."""
+        with cls._swap_lock:
+            cls.failed_loads.clear()
+
+    @classmethod
+    def _check_backoff(cls, key: tuple) -> None:
+        # Caller holds _swap_lock
+        failed = cls.failed_loads.get(key)
+        if failed is None:
+            return
+        failures, retry_at, error = failed
+        remaining = retry_at - time.monotonic()
+        if remaining > 0:
+            raise LoadBackoff(
+                f"Model version {key[1]} failed to load {failures} time(s) ({error}); "
+                f"next attempt in {remaining:.0f}s"
+            )
+
+    @classmethod
+    def _load_failed(cls, key: tuple, error: Exception) -> None:
+        with cls._swap_lock:
+            failures = cls.failed_loads.pop(key, (0, 0.0, None))[0] + 1
+            delay = min(cls.load_retry_max_seconds, cls.load_retry_seconds * 2 ** (failures - 1))
+            cls.failed_loads[key] = (failures, time.monotonic() + delay, str(error))
+            while len(cls.failed_loads) > cls.max_failed_loads:
+                del cls.failed_loads[next(iter(cls.failed_loads))]
+        print(f"Model version {key[1]} failed to load: {error}; skipped for {delay:.0f}s")
+
+    @classmethod
+    def _source_for(cls, name: str, version: str) -> dict:
+        source = cls.sources.get((name, version))
+        if source is not None:
+            return source
+
+        model_template = os.getenv("MODEL_URI_TEMPLATE")
+        fe_template = os.getenv("FE_URI_TEMPLATE")
+        if name != cls.model_name or not (model_template and fe_template):
+            raise LookupError(f"Unknown model version: {name} {version}")
+        check_version(version)
+        plan_template = os.getenv("FEATURE_PLAN_URI_TEMPLATE")
+        return {
+            "version": version,
+            "model_uri": model_template.format(version=version),
+            "fe_uri": fe_template.format(version=version),
+            "plan_uri": plan_template.format(version=version) if plan_template else None,
+        }
+
+    @classmethod
+    def _remember(cls, bundle: ArtifactBundle) -> ArtifactBundle:
+        """Add a bundle to the registry and evict LRU bundles over the memory budget."""
+        with cls._swap_lock:
+            cls.bundles[bundle.key] = bundle
+            cls.bundles.move_to_end(bundle.key)
+            cls._evict(keep=bundle)
+        return bundle
+
+    @classmethod
+    def _evict(cls, keep: ArtifactBundle) -> None:
+        # Caller holds _swap_lock. Evicted bundles are only dropped from the
+        # registry; requests already holding one finish with it.
+        pinned = {b for b in (cls.current, cls.previous, keep) if b is not None}
+        total = sum(b.nbytes for b in cls.bundles.values())
+        for key, bundle in list(cls.bundles.items()):
+            if total <= cls.max_bytes:
+                break
+            if bundle in pinned:
+                continue
+            del cls.bundles[key]
+            total -= bundle.nbytes
+            cls.evictions += 1
+            print(f"Evicted model version {bundle.version} from memory")
+
+    @classmethod
+    def build(
+        cls,
+        version: str,
+        model_uri: str,
+        fe_uri: str,
+        plan_uri: Optional[str] = None,
+        threshold: Optional[float] = None,
+        name: Optional[str] = None,
+    ) -> ArtifactBundle:
+        """Fetch and validate one model version's artifacts without touching the live bundle."""
+        threshold = cls.threshold if threshold is None else threshold
+        if not 0.0 < threshold < 1.0:
+            raise ValueError(f"MODEL_DECISION_THRESHOLD must be in (0, 1), got {threshold}")
+
+        name = name or cls.model_name
+
+        # Local paths from env vars or defaults; suffixed per model and version
+        # so a reload never overwrites files another bundle was loaded from
+        if (name, version) == (cls.model_name, cls.version):
+            suffix = ""
+        else:
+            suffix = "." + re.sub(r"[^\w.-]", "_", name) + f".v{version}"
+        local_model = os.getenv("LOCAL_MODEL_PATH", "/tmp/model.pkl") + suffix
+        local_fe = os.getenv("LOCAL_FE_PATH", "/tmp/feature_engineering.joblib") + suffix
+        local_plan = os.getenv("LOCAL_FEATURE_PLAN_PATH", "/tmp/feature_plan.json") + suffix
+
+        # ARTIFACT_MMAP=1 maps the feature engineer's arrays read-only from the
+        # file, so workers share them through the page cache
+        mmap_mode = "r" if os.getenv("ARTIFACT_MMAP", "0") == "1" else None
+
+        paths = {}
+
+        def load_model():
+            path = paths["model"] = artifact_store.fetch(model_uri, local_model)
+            with open(path, "rb") as f:
+                return pickle.load(f)
+
+        def load_fe():
+            path = paths["fe"] = artifact_store.fetch(fe_uri, local_fe)
+            return joblib.load(path, mmap_mode=mmap_mode)
+
+        def load_plan():
+            path = paths["plan"] = artifact_store.fetch(plan_uri, local_plan)
+            return FeaturePlan.load(path)
+
+        # Artifact URIs pick their store by scheme (file://, az://); bare
+        # paths are blobs in AZURE_STORAGE_CONTAINER_NAME. Everything is
+        # fetched and deserialized at once, so cold start costs the slowest
+        # artifact rather than the sum.
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="artifact-fetch") as pool:
+            model_future = pool.submit(load_model)
+            fe_future = pool.submit(load_fe)
+            plan_future = pool.submit(load_plan) if plan_uri else None
+            model, fe = model_future.result(), fe_future.result()
+            plan = plan_future.result() if plan_future else None
+        print(f"Artifacts for version {version} loaded in {time.perf_counter() - started:.2f}s")
+
+        # Optional compiled feature plan for the pandas-free fast path
+        if plan is not None:
+            if check_feature_parity(plan, fe, dtype=cls.feature_dtype):
+                print("Feature plan parity check passed, fast path enabled")
+            else:
+                print("Feature plan disabled, falling back to fe.transform")
+                plan = None
+
+        return ArtifactBundle(
+            name=name,
+            version=version,
+            model_id=cls.resolve_model_id(name, version),
+            model=model,
+            fe=fe,
+            scorer=cls._build_scorer(model),
+            threshold=threshold,
+            feature_dtype=cls.feature_dtype,
+            plan=plan,
+            source={
+                "version": version,
+                "model_uri": model_uri,
+                "fe_uri": fe_uri,
+                "plan_uri": plan_uri,
+                "threshold": threshold,
+            },
+            nbytes=sum(os.path.getsize(path) for path in paths.values()),
         )
 
-        # Local paths from env vars or defaults
-        local_model = os.getenv("LOCAL_MODEL_PATH", "/tmp/model.pkl")
-        local_fe = os.getenv("LOCAL_FE_PATH", "/tmp/feature_engineering.joblib")
+    @staticmethod
+    def resolve_model_id(name: str, version: str, engine=None) -> int:
+        """
+        Id of the MLModel row for (name, version), inserting the row if missing.
+
+        Runs once per bundle load, so requests never look the model up.
+        Loading a model therefore needs the database (``engine``, by default
+        the application's): predictions reference the row by id, so there is
+        no id to fall back to. When it is unreachable the load fails; at
+        startup that is logged and requests get 503 until a reload succeeds.
+        """
+        # Imported here: the loader is used by tooling that has no database
+        from sqlmodel import Session, select, func
+        from models.model import MLModel
+        if engine is None:
+            from db.database import engine
+
+        with Session(engine) as session:
+            if engine.dialect.name == "postgresql":
+                # (name, version) has no unique constraint; serialize workers
+                # loading a new version at the same time so only one inserts
+                session.exec(select(func.pg_advisory_xact_lock(func.hashtext(f"mlmodels:{name}:{version}"))))
+            model_id = session.exec(
+                select(MLModel.id)
+                .where(MLModel.name == name, MLModel.version == version)
+                .order_by(MLModel.id)
+            ).first()
+            if model_id is None:
+                record = MLModel(name=name, version=version, description="Registered when first loaded")
+                session.add(record)
+                session.flush()
+                model_id = record.id
+                print(f"Registered MLModel {name} {version} (id {model_id})")
+            session.commit()
+        return model_id
+
+    @classmethod
+    def reload(cls, version: str, model_uri: str, fe_uri: str, plan_uri: Optional[str] = None,
+               threshold: Optional[float] = None) -> dict:
+        """
+        Load ``version`` next to the live bundle, smoke-test it, then swap it in.
+
+        Raises ValueError when the new bundle fails its smoke test; the live
+        bundle is left untouched in that case.
+        """
+        with cls._reload_lock:
+            candidate = cls.build(version, model_uri, fe_uri, plan_uri, threshold)
+            report = smoke_test(candidate, reference=cls.current)
+
+            with cls._swap_lock:
+                cls.previous, cls.current = cls.current, candidate
+                cls.previous_until = time.monotonic() + cls.rollback_window
+            cls._remember(candidate)
+            cls.sources[candidate.key] = candidate.source
+        print(f"Model version {candidate.version} is live")
+        return report
+
+    @classmethod
+    def rollback(cls) -> ArtifactBundle:
+        """Swap the previous bundle back in while it is still retained."""
+        with cls._swap_lock:
+            cls._expire_previous()
+            if cls.previous is None:
+                raise LookupError("No previous model version to roll back to")
+            cls.current, cls.previous = cls.previous, cls.current
+            cls.previous_until = time.monotonic() + cls.rollback_window
+        print(f"Rolled back to model version {cls.current.version}")
+        return cls.current
+
+    @classmethod
+    def status(cls) -> dict:
+        with cls._swap_lock:
+            cls._expire_previous()
+            current, previous = cls.current, cls.previous
+            loaded = list(cls.bundles.values())
+        return {
+            "current": current.describe() if current else None,
+            "previous": previous.describe() if previous else None,
+            "rollback_seconds_left": max(0.0, cls.previous_until - time.monotonic()) if previous else 0.0,
+            "loaded": [b.describe() for b in loaded],
+            "registered": sorted(version for _, version in cls.sources),
+            "nbytes": sum(b.nbytes for b in loaded),
+            "max_bytes": cls.max_bytes,
+            "evictions": cls.evictions,
+        }
+
+    @classmethod
+    def _expire_previous(cls) -> None:
+        # Drop the old bundle once the rollback window passes so its memory
+        # is released as soon as in-flight requests are done with it
+        if cls.previous is not None and time.monotonic() >= cls.previous_until:
+            cls.previous = None
+
+    @classmethod
+    def _build_scorer(cls, model):
+        if cls.engine != "compiled":
+            return model
+
+        try:
+            compiled = CompiledForest.from_sklearn(model)
+        except ValueError as e:
+            print(f"Compiled engine unavailable ({e}), using sklearn")
+            return model
+
+        # Load-time parity test against sklearn before serving from the arrays
+        diff = compiled.max_abs_diff(model, parity_probe(compiled))
+        if diff > 1e-9:
+            print(f"Compiled engine parity failed (max abs diff {diff:.3g}), using sklearn")
+            return model
+
+        print(f"Compiled engine enabled: {compiled.n_trees} trees, depth {compiled.max_depth}")
+        return compiled
+
+
+def smoke_test(bundle: ArtifactBundle, reference: Optional[ArtifactBundle] = None, n: int = 32) -> dict:
+    """
+    Warm a freshly built bundle and check it scores sanely before it goes live.
+
+    Probe customers are built from the bundle's feature plan (or the
+    reference bundle's) and pushed through featurize + predict_proba; without
+    any plan the scorer alone is exercised on a synthetic matrix. Raises
+    ValueError when probabilities are missing, non-finite or out of [0, 1].
+    With a reference bundle, the mean absolute probability shift is reported.
+    """
+    # Imported here: ml.inference imports this module
+    from ml.inference import featurize, score
+
+    plan = bundle.plan or (reference.plan if reference else None)
+    started = time.perf_counter()
+    if plan is not None:
+        probes = probe_inputs(plan, n=n)
+        _, probs = score(featurize(probes, bundle), bundle)
+    else:
+        probes = None
+        n_features = getattr(bundle.model, "n_features_in_", None)
+        if n_features is None:
+            raise ValueError("Cannot smoke-test a model without a feature plan or n_features_in_")
+        X = np.random.default_rng(0).normal(size=(n, n_features))
+        _, probs = score(X, bundle)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    probs = np.asarray(probs, dtype=np.float64)
+    if probs.shape != (n,) or not np.all(np.isfinite(probs)) or probs.min() < 0 or probs.max() > 1:
+        raise ValueError(f"Smoke test failed for model version {bundle.version}")
+
+    report = {"version": bundle.version, "probes": n, "elapsed_ms": round(elapsed_ms, 3)}
+    if reference is not None and probes is not None:
+        try:
+            _, ref_probs = score(featurize(probes, reference), reference)
+            report["mean_abs_shift"] = float(np.mean(np.abs(probs - ref_probs)))
+        except Exception as e:  # features changed between versions; not fatal
+            report["mean_abs_shift"] = None
+            print(f"Could not compare against version {reference.version}: {e}")
+    return report
+
 
-        loader.download(model_blob, local_model)
-        loader.download(fe_blob, local_fe)
+def preload_artifacts(engine) -> Optional[dict]:
+    """
+    Load the artifacts before workers fork, when PRELOAD_ARTIFACTS=1.
 
-        with open(local_model, "rb") as f:
-            cls.model = pickle.load(f)
+    With `gunicorn --preload` the app module is imported once in the master,
+    so loading there lets every forked worker share the artifacts' pages
+    instead of unpickling its own copy. gc.freeze() keeps the collector from
+    touching (and thereby copying) those objects in the workers.
 
-        cls.fe = joblib.load(local_fe)
\ No newline at end of file
+    Returns the master's memory report, or None when preloading is off.
+    """
+    if os.getenv("PRELOAD_ARTIFACTS", "0") != "1":
+        return None
+    ModelArtifacts.load()
+    # Loading resolved the MLModel row; drop those connections so forked
+    # workers open their own instead of sharing the master's sockets
+    engine.dispose()
+    gc.freeze()
+    return memory_usage()
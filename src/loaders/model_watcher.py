@@ -0,0 +1,63 @@
+import asyncio
+import json
+import os
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from .artifact_cache import atomic_write
+from .model_loader import ModelArtifacts
+
+# JSON file naming the model version every worker should serve. The admin
+# reload/rollback endpoints write it; each worker polls it and follows, so
+# a reload reaches all gunicorn workers, not just the one that took the call.
+CONTROL_FILE = os.getenv("MODEL_CONTROL_FILE")
+POLL_SECONDS = float(os.getenv("MODEL_CONTROL_POLL_SECONDS", "5"))
+
+
+def publish(source: dict) -> None:
+    """Record the version workers should serve; no-op without MODEL_CONTROL_FILE."""
+    if CONTROL_FILE:
+        atomic_write(CONTROL_FILE, lambda f: f.write(json.dumps(source).encode()))
+
+
+def apply(source: dict) -> Optional[str]:
+    """
+    Bring this worker in line with ``source``.
+
+    Uses the retained previous bundle when it is the requested version
+    (instant rollback), otherwise loads it. Returns the action taken.
+    """
+    current, previous = ModelArtifacts.current, ModelArtifacts.previous
+    if current is not None and current.source == source:
+        return None
+    if previous is not None and previous.source == source:
+        ModelArtifacts.rollback()
+        return "rollback"
+    ModelArtifacts.reload(**source)
+    return "reload"
+
+
+async def watch(path: str = CONTROL_FILE, interval: float = POLL_SECONDS) -> None:
+    """Poll the control file and follow it; failures keep the live bundle."""
+    seen = None
+    while True:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        if mtime is not None and mtime != seen:
+            seen = mtime
+            # New instructions: versions that failed to load get another chance
+            ModelArtifacts.forget_failed_loads()
+            try:
+                with open(path) as f:
+                    source = json.load(f)
+                action = await run_in_threadpool(apply, source)
+                if action:
+                    print(f"Model control file applied ({action}): version {source.get('version')}")
+            except Exception as e:
+                print(f"Failed applying model control file {path}: {e}")
+
+        await asyncio.sleep(interval)
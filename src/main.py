@@ -1,11 +1,14 @@
 from fastapi import FastAPI
-import os
+import asyncio
 from contextlib import asynccontextmanager
 # from sqlmodel import Session, select
-from db.database import create_db_and_tables
+from db.database import engine
+from db import write_behind
 from controllers.routes import feedback, auth, user
 from utils.create_admin_user import create_default_admin
-from loaders.model_loader import ModelArtifacts
+from loaders.model_loader import ModelArtifacts, preload_artifacts
+from loaders import model_watcher
+from ml import inference
 
 from controllers.routes import prediction, admin, health_check, users
 # from init_db import create_database_if_not_exists
@@ -16,6 +19,8 @@ from contextlib import asynccontextmanager
 # from db.database import engine,Base
 from controllers.routes.users import router as users_router
 from utils.logging import configure_logging
+from utils.memory import memory_usage
+from utils import ids
 from controllers.middleware.middleware import RequestIDMiddleware
 from fastapi.middleware.cors import CORSMiddleware  
 
@@ -37,12 +42,26 @@ configure_logging(log_level="INFO", json_logs=True)
 log = structlog.get_logger()
 
 
+# Under `gunicorn --preload` this loads the artifacts once in the master so
+# forked workers share them; see preload_artifacts
+preload_report = preload_artifacts(engine)
+PRELOAD_ARTIFACTS = preload_report is not None
+if PRELOAD_ARTIFACTS:
+    log.info("ml_artifacts_preloaded", **preload_report)
+
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- Startup Block ---
-    # 1) Create DB tables
-    create_db_and_tables()
+    # 1) The schema is owned by Alembic (`alembic upgrade head` in
+    # entrypoint.sh runs before the app starts), not created here
+
+    # Node id for time-ordered prediction ids, unique among running workers
+    try:
+        ids.configure_from_database(engine)
+    except Exception as e:
+        print("Failed to reserve a snowflake node id, using a random one:", e)
 
     # 2) Create default admin
     try:
@@ -51,14 +70,37 @@ async def lifespan(app: FastAPI):
         print("Failed to create default admin:", e)
 
     # 3) Load model + feature engineering artifacts ONCE
+    # (a no-op in workers when the master already preloaded them)
+    before = memory_usage()
     try:
         ModelArtifacts.load()
         print("ML artifacts loaded successfully")
     except Exception as e:
         print("Failed loading ML artifacts:", e)
+    log.info(
+        "worker_memory",
+        pid=before["pid"],
+        preloaded=PRELOAD_ARTIFACTS,
+        rss_before_mb=before["rss_mb"],
+        **memory_usage(),
+    )
+
+    # 4) Follow model reloads/rollbacks published by any worker
+    watcher = asyncio.create_task(model_watcher.watch()) if model_watcher.CONTROL_FILE else None
 
     yield  # app runs here
 
+    # --- Shutdown Block ---
+    if watcher is not None:
+        watcher.cancel()
+    if inference.batcher is not None:
+        await inference.batcher.stop()
+    if inference.shadow is not None:
+        inference.shadow.stop()
+    if write_behind.writer is not None:
+        write_behind.writer.stop()
+    ModelArtifacts.executor.shutdown()
+
 
 
 # @asynccontextmanager
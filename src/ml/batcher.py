@@ -0,0 +1,142 @@
+import asyncio
+import bisect
+import time
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``counts[i]`` holds observations <= ``buckets[i]``."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def snapshot(self) -> dict:
+        return {
+            "buckets": [*self.buckets, "+Inf"],
+            "counts": list(self.counts),
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent scoring requests into one vectorized call.
+
+    The first queued request opens a window; everything that arrives within
+    ``max_wait_ms`` (or until ``max_batch_size`` rows are collected) is
+    stacked and scored together, and each caller gets back its own slice of
+    ``(labels, probabilities)``. ``score_fn`` runs off the event loop via
+    ``run_in_executor``. Extra ``submit`` arguments (e.g. the model bundle)
+    are passed through to ``score_fn``; requests are only coalesced with
+    others that passed the very same arguments.
+    """
+
+    def __init__(
+        self,
+        score_fn: Callable,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        stack_fn: Callable = np.concatenate,
+        executor=None,
+    ):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stack_fn = stack_fn
+        self.executor = executor
+        self.batch_size = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256])
+        self.queue_wait_ms = Histogram([0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100])
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._carry = None  # first item of the next batch, when args changed
+
+    async def submit(self, X, *args):
+        """Queue a feature matrix and wait for ``score_fn(X, *args)``'s slice."""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._carry = None
+            self._task = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((X, time.perf_counter(), future, args))
+        return await future
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batch_size": self.batch_size.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if self._carry is not None:
+                batch, self._carry = [self._carry], None
+            else:
+                batch = [await self._queue.get()]
+            rows = len(batch[0][0])
+            args = batch[0][3]
+            deadline = loop.time() + self.max_wait
+            while rows < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not _same_args(item[3], args):
+                    self._carry = item
+                    break
+                batch.append(item)
+                rows += len(item[0])
+
+            await self._score(loop, batch, rows, args)
+
+    async def _score(self, loop, batch: List[tuple], rows: int, args: tuple = ()) -> None:
+        started = time.perf_counter()
+        for _, enqueued, _, _ in batch:
+            self.queue_wait_ms.observe((started - enqueued) * 1000)
+        self.batch_size.observe(rows)
+
+        try:
+            X = self.stack_fn([item[0] for item in batch])
+            labels, probs = await loop.run_in_executor(self.executor, self.score_fn, X, *args)
+        except Exception as e:
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for X_part, _, future, _ in batch:
+            n = len(X_part)
+            if not future.done():  # caller may have been cancelled
+                future.set_result((labels[offset:offset + n], probs[offset:offset + n]))
+            offset += n
+
+
+def _same_args(a: tuple, b: tuple) -> bool:
+    return len(a) == len(b) and all(x is y for x, y in zip(a, b))
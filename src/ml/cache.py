@@ -0,0 +1,136 @@
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+
+class PredictionCache:
+    """
+    In-process LRU cache of prediction results with a TTL.
+
+    Entries are keyed by the canonical input hash and scoped to one model
+    version (any string identifying what produced the results): seeing a
+    new version drops every entry. The cache is bounded
+    by entry count and, optionally, by an approximate byte budget.
+    Concurrent misses for the same key share a single computation
+    (single-flight). Meant to be used from the event loop only.
+    """
+
+    def __init__(self, max_entries: int = 100_000, max_bytes: Optional[int] = None, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self.version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.discarded = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._inflight = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, version: str):
+        """Return the cached value or None; counts a hit or a miss."""
+        self._check_version(version)
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at, size = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self._drop(key)
+            self.expirations += 1
+        self.misses += 1
+        return None
+
+    def put(self, key: str, version: str, value) -> None:
+        """
+        Cache value for key. Only ``get`` moves the cache to a new version: a
+        result computed under a version that has been replaced since is
+        discarded rather than clearing the current version's entries.
+        """
+        if self.version is None:
+            self.version = version
+        elif version != self.version:
+            self.discarded += 1
+            return
+        if key in self._entries:
+            self._drop(key)
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        self._entries[key] = (value, time.monotonic() + self.ttl, size)
+        self._bytes += size
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    async def get_or_compute(self, key: str, version: str, compute: Callable[[], Awaitable]):
+        """
+        Cached value for key, or await compute() once for all concurrent callers.
+
+        compute() runs as a task of its own that every caller awaits through
+        a shield, so a caller that is cancelled (e.g. its client went away)
+        leaves the computation running for the others.
+        """
+        value = self.get(key, version)
+        if value is not None:
+            return value
+
+        flight_key = (version, key)
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(self._fill(flight_key, key, version, compute))
+            # Retrieve the outcome even when every caller was cancelled
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[flight_key] = task
+        return await asyncio.shield(task)
+
+    async def _fill(self, flight_key: tuple, key: str, version: str, compute: Callable[[], Awaitable]):
+        try:
+            value = await compute()
+        finally:
+            self._inflight.pop(flight_key, None)
+        self.put(key, version, value)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "discarded": self.discarded,
+            "inflight": len(self._inflight),
+        }
+
+    def _check_version(self, version: str) -> None:
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self.clear()
+            self.version = version
+
+    def _drop(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
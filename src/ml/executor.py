@@ -0,0 +1,59 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the inference executor has no room for another request."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Inference capacity exhausted")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    Dedicated, sized thread pool for CPU-bound featurization and scoring.
+
+    Keeps model work off Starlette's shared threadpool so auth and health
+    requests are not starved. ``admit()`` bounds the number of requests
+    running or waiting for the pool; beyond ``max_pending`` callers are
+    rejected immediately instead of queueing without limit. Admission
+    bookkeeping happens on the event loop thread only.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 64, retry_after: int = 1):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self.pending = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    @contextmanager
+    def admit(self):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorSaturated(self.retry_after)
+        self.pending += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.pending -= 1
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,189 @@
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+# Raw ChurnInput fields and how the training pipeline treats them
+CALL_FEATURES = ['InboundCalls', 'OutboundCalls']
+DERIVED_FEATURE = 'TotalCalls'
+BINARY_FEATURES = ['RespondsToMailOffers', 'MadeCallToRetentionTeam']
+BINARY_MAPPING = {'Yes': 1, 'No': 0}
+LOW_CARD_FEATURES = ['CreditRating', 'IncomeGroup', 'Occupation', 'PrizmCode']
+
+
+@dataclass
+class FeaturePlan:
+    """
+    Compiled preprocessing fitted once on the training frame.
+
+    Holds every statistic the pipeline needs (imputation medians/modes,
+    scaler means/stds, binary maps, one-hot column indices) so a request
+    is featurized by writing straight into a row laid out like
+    ``columns`` -- nothing is fitted at inference time.
+    """
+    columns: List[str]
+    medians: Dict[str, float]
+    modes: Dict[str, str]
+    means: Dict[str, float]
+    stds: Dict[str, float]
+    binary_maps: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    onehot_index: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        index = {col: i for i, col in enumerate(self.columns)}
+
+        # (source field, column index, median) for plain numeric features
+        self._numeric = [
+            (name, index[name], self.medians.get(name, 0.0))
+            for name in self.medians
+            if name in index and name != DERIVED_FEATURE
+        ]
+        self._total_calls = index.get(DERIVED_FEATURE)
+        self._binary = [
+            (name, index[name], self.binary_maps[name], self.modes.get(name))
+            for name in self.binary_maps
+            if name in index
+        ]
+        self._onehot = [
+            (name, mapping, self.modes.get(name))
+            for name, mapping in self.onehot_index.items()
+        ]
+
+        # Standardization folded into one multiply-add over the whole row;
+        # one-hot columns keep scale 1 and offset 0.
+        scale = np.ones(len(self.columns))
+        offset = np.zeros(len(self.columns))
+        for name, mean in self.means.items():
+            if name in index:
+                std = self.stds.get(name) or 1.0
+                scale[index[name]] = 1.0 / std
+                offset[index[name]] = mean / std
+        self._scale = scale
+        self._offset = offset
+
+    @property
+    def n_features(self) -> int:
+        return len(self.columns)
+
+    @classmethod
+    def fit(cls, df, train_columns: Sequence[str]) -> "FeaturePlan":
+        """Build a plan from the raw training frame (ChurnInput columns)."""
+        df = df.copy()
+        df[DERIVED_FEATURE] = df[CALL_FEATURES[0]] + df[CALL_FEATURES[1]]
+        df = df.drop(columns=CALL_FEATURES)
+
+        cat_features = [c for c in BINARY_FEATURES + LOW_CARD_FEATURES if c in df.columns]
+        num_features = [c for c in df.columns if c not in cat_features]
+
+        medians = {c: float(df[c].median()) for c in num_features}
+        modes = {c: str(df[c].mode().iloc[0]) for c in cat_features}
+
+        filled = df[num_features].fillna(medians)
+        for c in BINARY_FEATURES:
+            if c in df.columns:
+                filled[c] = df[c].fillna(modes[c]).map(BINARY_MAPPING).fillna(0)
+
+        scaled = [c for c in filled.columns if c in train_columns]
+        means = {c: float(filled[c].mean()) for c in scaled}
+        # StandardScaler uses the population std; constant columns keep scale 1
+        stds = {c: float(filled[c].std(ddof=0)) or 1.0 for c in scaled}
+
+        col_index = {col: i for i, col in enumerate(train_columns)}
+        onehot_index = {}
+        for c in LOW_CARD_FEATURES:
+            if c not in df.columns:
+                continue
+            mapping = {}
+            for category in df[c].dropna().unique():
+                j = col_index.get(f"{c}_{category}")
+                if j is not None:
+                    mapping[str(category)] = j
+            onehot_index[c] = mapping
+
+        return cls(
+            columns=list(train_columns),
+            medians=medians,
+            modes=modes,
+            means=means,
+            stds=stds,
+            binary_maps={c: dict(BINARY_MAPPING) for c in BINARY_FEATURES if c in df.columns},
+            onehot_index=onehot_index,
+        )
+
+    def transform(
+        self,
+        records: Sequence[Mapping],
+        out: Optional[np.ndarray] = None,
+        dtype=np.float64,
+    ) -> np.ndarray:
+        """
+        Featurize raw records into an (n, n_features) matrix.
+
+        ``out`` may be a preallocated buffer of the right shape; it is
+        overwritten and returned.
+        """
+        n = len(records)
+        if out is None:
+            out = np.zeros((n, len(self.columns)), dtype=dtype)
+        else:
+            out.fill(0)
+
+        total_median = self.medians.get(DERIVED_FEATURE, 0.0)
+        for i, rec in enumerate(records):
+            row = out[i]
+            for name, j, median in self._numeric:
+                value = rec.get(name)
+                row[j] = median if _missing(value) else value
+
+            if self._total_calls is not None:
+                inbound = rec.get(CALL_FEATURES[0])
+                outbound = rec.get(CALL_FEATURES[1])
+                row[self._total_calls] = (
+                    total_median if _missing(inbound) or _missing(outbound) else inbound + outbound
+                )
+
+            for name, j, mapping, mode in self._binary:
+                value = rec.get(name)
+                row[j] = mapping.get(mode if _missing(value) else value, 0)
+
+            for name, mapping, mode in self._onehot:
+                value = rec.get(name)
+                j = mapping.get(mode if _missing(value) else value)
+                if j is not None:
+                    row[j] = 1
+
+        out *= self._scale
+        out -= self._offset
+        return out
+
+    def to_dict(self) -> dict:
+        return {
+            "columns": self.columns,
+            "medians": self.medians,
+            "modes": self.modes,
+            "means": self.means,
+            "stds": self.stds,
+            "binary_maps": self.binary_maps,
+            "onehot_index": self.onehot_index,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FeaturePlan":
+        return cls(**data)
+
+    def save(self, path: str) -> str:
+        """Write the plan as JSON so it can be shipped next to the model."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(self.to_dict()))
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "FeaturePlan":
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+
+def _missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
@@ -0,0 +1,142 @@
+import os
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from loaders.model_loader import ModelArtifacts
+from .batcher import MicroBatcher
+from .cache import PredictionCache
+from .shadow import ShadowScorer
+
+
+def featurize(inputs, bundle):
+    """
+    Turn validated ChurnInput rows into the bundle's feature matrix.
+
+    Uses the compiled feature plan when it passed the load-time parity check,
+    writing straight into a NumPy array with no DataFrame in between;
+    otherwise falls back to the pickled feature engineer.
+    """
+    if bundle.plan is not None:
+        return bundle.plan.transform([vars(row) for row in inputs], dtype=bundle.feature_dtype)
+    return bundle.fe.transform(pd.DataFrame([row.model_dump() for row in inputs]))
+
+
+def score(X, bundle):
+    """
+    Score a feature matrix with a single predict_proba pass.
+
+    Labels are derived from the churn probability and the decision threshold
+    configured for the bundle's model version, so predict() is never called.
+    A probability must exceed the threshold: at the default of 0.5 that
+    agrees with predict(), whose argmax picks class 0 on a tie.
+    Returns (labels, probabilities) as 1-D arrays.
+    """
+    probs = bundle.scorer.predict_proba(X)[:, 1]
+    labels = (probs > bundle.threshold).astype(int)
+    return labels, probs
+
+
+def _stack(parts):
+    # The fe.transform fallback yields DataFrames; keep feature names intact
+    if isinstance(parts[0], pd.DataFrame):
+        return pd.concat(parts, ignore_index=True)
+    return np.concatenate(parts)
+
+
+# Coalesces concurrent single-row /predict/ calls into one predict_proba.
+# Enabled per worker with PREDICT_MICROBATCH=1.
+batcher = (
+    MicroBatcher(
+        score,
+        max_batch_size=int(os.getenv("PREDICT_MICROBATCH_MAX_ROWS", "64")),
+        max_wait_ms=float(os.getenv("PREDICT_MICROBATCH_WINDOW_MS", "2")),
+        stack_fn=_stack,
+        executor=ModelArtifacts.executor.pool,
+    )
+    if os.getenv("PREDICT_MICROBATCH", "0") == "1"
+    else None
+)
+
+
+# Result cache for re-scored payloads, keyed by input hash + model version.
+# Enabled per worker with PREDICT_CACHE=1.
+cache = (
+    PredictionCache(
+        max_entries=int(os.getenv("PREDICT_CACHE_MAX_ENTRIES", "100000")),
+        max_bytes=int(os.getenv("PREDICT_CACHE_MAX_BYTES")) if os.getenv("PREDICT_CACHE_MAX_BYTES") else None,
+        ttl_seconds=float(os.getenv("PREDICT_CACHE_TTL_SECONDS", "3600")),
+    )
+    if os.getenv("PREDICT_CACHE", "0") == "1"
+    else None
+)
+
+
+def _score_rows(inputs, bundle):
+    return score(featurize(inputs, bundle), bundle)[1]
+
+
+def _write_shadow_rows(rows):
+    # Imported here so the scoring code stays usable without a database
+    from sqlalchemy import insert
+    from db.database import get_session
+    from models.model import ShadowPrediction
+
+    with contextmanager(get_session)() as session:
+        session.execute(insert(ShadowPrediction), rows)
+        session.commit()
+
+
+# Candidate model scoring a rate-limited sample of live traffic off the
+# request path, for comparison before promotion.
+# Enabled per worker by naming the version in SHADOW_MODEL_VERSION.
+shadow = (
+    ShadowScorer(
+        os.getenv("SHADOW_MODEL_VERSION"),
+        load_candidate=ModelArtifacts.get,
+        score_rows=_score_rows,
+        write_rows=_write_shadow_rows,
+        max_queue=int(os.getenv("SHADOW_MAX_QUEUE", "1000")),
+        rate_per_second=float(os.getenv("SHADOW_RATE_PER_SECOND", "50")),
+        # Shed shadow work as soon as live requests start queueing
+        busy=lambda: ModelArtifacts.executor.pending > ModelArtifacts.executor.max_workers,
+    )
+    if os.getenv("SHADOW_MODEL_VERSION")
+    else None
+)
+
+
+async def score_async(X, bundle):
+    """Score X on the inference executor, through the micro-batcher if enabled."""
+    if batcher is not None:
+        return await batcher.submit(X, bundle)
+    return await ModelArtifacts.executor.run(score, X, bundle)
+
+
+async def predict_one(data, bundle):
+    """
+    Score one ChurnInput with ``bundle`` off the event loop, returning (label, probability).
+
+    Served from the result cache when enabled and ``bundle`` is the live
+    one; concurrent identical payloads share a single featurize + score.
+    Raises ExecutorSaturated when the inference executor's backlog is full.
+    """
+    async def compute():
+        with ModelArtifacts.executor.admit():
+            X = await ModelArtifacts.executor.run(featurize, [data], bundle)
+            labels, probs = await score_async(X, bundle)
+        return int(labels[0]), float(probs[0])
+
+    # The cache holds the live version only; candidate versions bypass it
+    # rather than invalidating it on every switch
+    if cache is None or bundle is not ModelArtifacts.current:
+        return await compute()
+    return await cache.get_or_compute(data.canonical_hash(), cache_version(bundle), compute)
+
+
+def cache_version(bundle) -> str:
+    """
+    What cached results depend on: reloading a version with a new threshold
+    or new artifacts builds a new bundle, which must not serve old labels.
+    """
+    return f"{bundle.name}:{bundle.version}:{bundle.threshold!r}:{bundle.loaded_at!r}"
+
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from schemas.churn_input import ChurnInput
+from .feature_plan import CALL_FEATURES, DERIVED_FEATURE, FeaturePlan
+
+
+def probe_inputs(plan: FeaturePlan, n: int = 8):
+    """
+    Build validated ChurnInput probes that cover every category the plan knows
+    and a spread of numeric values around the training medians.
+    """
+    call_median = plan.medians.get(DERIVED_FEATURE, 0.0) / 2
+    probes = []
+    for i in range(n):
+        spread = 0.5 + i / max(n - 1, 1)
+        record = {}
+        for name, info in ChurnInput.model_fields.items():
+            if info.annotation is str:
+                options = sorted(plan.onehot_index.get(name) or plan.binary_maps.get(name) or {})
+                options = options or [plan.modes.get(name, "")]
+                record[name] = options[i % len(options)]
+            else:
+                base = call_median if name in CALL_FEATURES else plan.medians.get(name, 0.0)
+                record[name] = info.annotation(base * spread)
+        probes.append(ChurnInput(**record))
+    return probes
+
+
+def check_feature_parity(plan: FeaturePlan, fe, dtype=np.float64, rtol=1e-5, atol=1e-6) -> bool:
+    """
+    Compare the pandas-free plan against the pickled feature engineer on probe inputs.
+
+    Returns True when both produce the same matrix in the same column order.
+    """
+    probes = probe_inputs(plan)
+    expected = fe.transform(pd.DataFrame([p.model_dump() for p in probes]))
+    if hasattr(expected, "columns") and list(expected.columns) != plan.columns:
+        print("Feature plan parity failed: column order differs from feature engineer")
+        return False
+
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = plan.transform([vars(p) for p in probes], dtype=dtype)
+    if expected.shape != actual.shape:
+        print(f"Feature plan parity failed: shape {actual.shape} != {expected.shape}")
+        return False
+
+    if not np.allclose(actual, expected, rtol=rtol, atol=atol):
+        worst = float(np.max(np.abs(actual - expected)))
+        print(f"Feature plan parity failed: max abs diff {worst:.3g}")
+        return False
+    return True
@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+
+class TokenBucket:
+    """Allows ``rate`` rows per second on average, with bursts up to ``burst``."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self, n: int = 1) -> int:
+        """Take up to ``n`` tokens; returns how many there were (0 when empty)."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        granted = min(n, int(self.tokens))
+        self.tokens -= granted
+        return granted
+
+
+class ShadowScorer:
+    """
+    Scores a sample of live traffic with a candidate model in the background.
+
+    ``submit`` never blocks and never raises: rows are dropped when the
+    token bucket is empty, the queue is full, or ``busy()`` reports the
+    primary path is under load; a batch larger than the tokens left is
+    cut down to as many rows as there are tokens. A single daemon thread drains the queue,
+    scores everything waiting as one matrix with the candidate bundle and
+    hands the comparison rows to ``write_rows``. The thread starts on first
+    use, so it is created in each worker rather than in a preloading master.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        load_candidate: Callable,
+        score_rows: Callable,
+        write_rows: Callable[[List[dict]], None],
+        max_queue: int = 1000,
+        rate_per_second: float = 50.0,
+        burst: Optional[float] = None,
+        max_batch_rows: int = 256,
+        busy: Optional[Callable[[], bool]] = None,
+    ):
+        self.version = version
+        self.load_candidate = load_candidate
+        self.score_rows = score_rows
+        self.write_rows = write_rows
+        self.max_batch_rows = max_batch_rows
+        self.busy = busy
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.submitted = 0
+        self.dropped = 0
+        self.scored = 0
+        self.failed = 0
+
+    def submit(self, inputs, primary, probabilities, prediction_ids) -> bool:
+        """Queue rows the primary bundle just scored; returns False when shed."""
+        if primary.version == self.version:
+            return False
+        n = len(inputs)
+        taken = 0 if self.busy is not None and self.busy() else self.bucket.take(n)
+        if not taken:
+            self.dropped += n
+            return False
+
+        # A batch larger than the tokens left is sampled, not dropped whole:
+        # its first ``taken`` rows are shadow-scored
+        item = (
+            list(inputs[:taken]),
+            primary.version,
+            np.array(probabilities[:taken], dtype=np.float64),
+            list(prediction_ids[:taken]),
+        )
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += n
+            return False
+
+        self.submitted += taken
+        self.dropped += n - taken
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "candidate_version": self.version,
+            "queue_depth": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "rate_per_second": self.bucket.rate,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "scored": self.scored,
+            "failed": self.failed,
+        }
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                batch = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            rows = len(batch[0][0])
+            while rows < self.max_batch_rows:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+                rows += len(item[0])
+
+            try:
+                self._score(batch, rows)
+            except Exception as e:
+                self.failed += rows
+                print(f"Shadow scoring with version {self.version} failed: {e}")
+
+    def _score(self, batch: List[tuple], rows: int) -> None:
+        candidate = self.load_candidate(self.version)
+        inputs = [row for item in batch for row in item[0]]
+
+        started = time.perf_counter()
+        probs = self.score_rows(inputs, candidate)
+        latency_ms = (time.perf_counter() - started) * 1000 / rows
+
+        records = []
+        offset = 0
+        for item_inputs, primary_version, primary_probs, prediction_ids in batch:
+            for i, prediction_id in enumerate(prediction_ids):
+                records.append({
+                    "prediction_id": prediction_id,
+                    "primary_version": primary_version,
+                    "candidate_version": candidate.version,
+                    "primary_probability": float(primary_probs[i]),
+                    "candidate_probability": float(probs[offset + i]),
+                    "candidate_latency_ms": latency_ms,
+                })
+            offset += len(item_inputs)
+
+        self.write_rows(records)
+        self.scored += rows
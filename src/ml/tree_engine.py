@@ -0,0 +1,117 @@
+import numpy as np
+
+
+class CompiledForest:
+    """
+    A fitted scikit-learn forest flattened into struct-of-arrays node tables.
+
+    All trees share one set of arrays (feature, threshold, left, right,
+    leaf value); ``roots`` holds each tree's first node. Leaves point to
+    themselves, so every row walks every tree with the same vectorized
+    step until all of them sit on a leaf. Only binary classifiers are
+    supported; ``predict_proba`` mirrors sklearn's (n, 2) output.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, n_features, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.n_features = n_features
+        self.max_depth = max_depth
+        # Interleaved child table: children[2 * i] is left, children[2 * i + 1] is right
+        self.children = np.stack([left, right], axis=1).ravel()
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """Compile a fitted RandomForestClassifier / ExtraTreesClassifier."""
+        estimators = getattr(model, "estimators_", None)
+        if not estimators or not hasattr(estimators[0], "tree_"):
+            raise ValueError(f"Cannot compile {type(model).__name__}: not a tree ensemble")
+        if len(model.classes_) != 2:
+            raise ValueError("Only binary classifiers can be compiled")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for est in estimators:
+            tree = est.tree_
+            n = tree.node_count
+            node_ids = np.arange(n, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            left = np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.int32)
+
+            counts = tree.value[:, 0, :]
+            proba = counts / counts.sum(axis=1, keepdims=True)
+
+            features.append(feature)
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(left)
+            rights.append(right)
+            values.append(proba[:, 1])
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            n_features=model.n_features_in_,
+            max_depth=max_depth,
+        )
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict_proba(self, X) -> np.ndarray:
+        # sklearn evaluates splits on float32 inputs; do the same for identical paths
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input of shape (n, {self.n_features}), got {X.shape}")
+
+        n = X.shape[0]
+        flat_x = X.ravel()
+        # One walker per (row, tree); each step gathers the split feature from
+        # the flattened input and jumps to children[2 * node + went_right].
+        base = np.repeat(np.arange(n) * self.n_features, self.n_trees)
+        nodes = np.tile(self.roots, n)
+        for _ in range(self.max_depth):
+            went_right = flat_x[base + self.feature[nodes]] > self.threshold[nodes]
+            nxt = self.children[2 * nodes + went_right]
+            if np.array_equal(nxt, nodes):
+                break  # every walker is on a leaf
+            nodes = nxt
+
+        p1 = self.value[nodes].reshape(n, self.n_trees).mean(axis=1)
+        return np.column_stack([1.0 - p1, p1])
+
+    def max_abs_diff(self, model, X) -> float:
+        """Largest absolute probability difference against the source model on X."""
+        return float(np.max(np.abs(self.predict_proba(X) - model.predict_proba(X))))
+
+
+def parity_probe(compiled: CompiledForest, n: int = 256, seed: int = 0) -> np.ndarray:
+    """
+    Rows for the load-time parity test: random standardized values plus
+    rows sitting exactly on split thresholds, where <= vs < would differ.
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.normal(0.0, 1.5, size=(n, compiled.n_features))
+
+    internal = compiled.left != np.arange(len(compiled.left))
+    feats = compiled.feature[internal]
+    thr = compiled.threshold[internal]
+    if len(thr):
+        picks = rng.integers(0, len(thr), size=n)
+        X[np.arange(n), feats[picks]] = thr[picks]
+    return X.astype(np.float32)
@@ -1,8 +1,11 @@
 from typing import Optional, List
 from datetime import datetime, timezone
+from sqlalchemy import BigInteger, Index
 from sqlmodel import SQLModel, Field, Relationship
 from uuid import UUID, uuid4
 from enum import Enum
+from db.types import JSONText
+from utils.ids import new_id
 
 
 class UserRole(str, Enum):
@@ -35,15 +38,34 @@ class User(SQLModel, table=True):
 
 class Prediction(SQLModel, table=True):
     __tablename__ = "predictions"
+    # Back the /predict/predictions/ filters; the trailing (created_at, id)
+    # is the keyset order, so a filtered page is one index range scan
+    __table_args__ = (
+        Index("ix_predictions_created_at_id", "created_at", "id"),
+        Index("ix_predictions_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_predictions_model_id_created_at", "model_id", "created_at", "id"),
+        Index("ix_predictions_model_version_created_at", "model_version", "created_at", "id"),
+        Index("ix_predictions_probability", "probability"),
+    )
 
-    id: Optional[int] = Field(default=None, primary_key=True)
+    # Time-ordered id generated in process, so child rows can be built
+    # without waiting for the insert
+    id: Optional[int] = Field(default_factory=new_id, primary_key=True, sa_type=BigInteger)
     user_id: UUID = Field(foreign_key="users.id")
-    input_data: str  # store JSON string of input
+    # Inputs live once per distinct payload in prediction_inputs. input_data
+    # is only set on rows from before that table existed.
+    input_hash: Optional[str] = Field(default=None, foreign_key="prediction_inputs.hash", index=True, max_length=64)
+    input_data: Optional[str] = Field(default=None, sa_type=JSONText)
     prediction: int
     probability: float
+    # Model that made the prediction. NULL only on rows written by an older
+    # release, which recorded it in predictionmetadata instead
+    model_id: Optional[int] = Field(default=None, foreign_key="mlmodels.id")
+    model_version: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     user: Optional[User] = Relationship(back_populates="predictions")
+    model: Optional["MLModel"] = Relationship(back_populates="predictions")
     prediction_metadata: Optional["PredictionMetadata"] = Relationship(
         back_populates="prediction",
         sa_relationship_kwargs={"uselist": False}
@@ -52,6 +74,16 @@ class Prediction(SQLModel, table=True):
     logs: List["PredictionLog"] = Relationship(back_populates="prediction")
 
 
+class PredictionInput(SQLModel, table=True):
+    """A distinct ChurnInput payload, keyed by ChurnInput.canonical_hash()."""
+    __tablename__ = "prediction_inputs"
+
+    hash: str = Field(primary_key=True, max_length=64)
+    # Validated ChurnInput as JSONB; selected as JSON text, decoded only on demand
+    input_data: str = Field(sa_type=JSONText)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
 class MLModel(SQLModel, table=True):
     __tablename__ = "mlmodels"
 
@@ -61,14 +93,21 @@ class MLModel(SQLModel, table=True):
     description: Optional[str]
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    predictions: List["Prediction"] = Relationship(back_populates="model")
     prediction_metadata: List["PredictionMetadata"] = Relationship(back_populates="model")
 
 
 class PredictionMetadata(SQLModel, table=True):
+    """
+    Legacy one-to-one model link, superseded by Prediction.model_id.
+
+    No longer written; kept for reads of rows inserted by older releases
+    until the table is dropped.
+    """
     __tablename__ = "predictionmetadata"
 
-    id: Optional[int] = Field(default=None, primary_key=True)
-    prediction_id: int = Field(foreign_key="predictions.id", unique=True)
+    id: Optional[int] = Field(default_factory=new_id, primary_key=True, sa_type=BigInteger)
+    prediction_id: int = Field(foreign_key="predictions.id", unique=True, sa_type=BigInteger)
     model_id: int = Field(foreign_key="mlmodels.id")
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
@@ -80,7 +119,7 @@ class Feedback(SQLModel, table=True):
     __tablename__ = "feedbacks"
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    prediction_id: int = Field(foreign_key="predictions.id")
+    prediction_id: int = Field(foreign_key="predictions.id", sa_type=BigInteger)
     user_id: UUID = Field(foreign_key="users.id")
     correct: Optional[bool]  # Was the prediction correct?
     comment: Optional[str]
@@ -93,8 +132,8 @@ class Feedback(SQLModel, table=True):
 class PredictionLog(SQLModel, table=True):
     __tablename__ = "predictionlogs"
 
-    id: Optional[int] = Field(default=None, primary_key=True)
-    prediction_id: int = Field(foreign_key="predictions.id")
+    id: Optional[int] = Field(default_factory=new_id, primary_key=True, sa_type=BigInteger)
+    prediction_id: int = Field(foreign_key="predictions.id", sa_type=BigInteger)
     user_id: UUID = Field(foreign_key="users.id")
     request_ip: Optional[str]
     user_agent: Optional[str]
@@ -102,3 +141,19 @@ class PredictionLog(SQLModel, table=True):
 
     prediction: Optional[Prediction] = Relationship(back_populates="logs")
     user: Optional[User] = Relationship(back_populates="logs")
+
+
+class ShadowPrediction(SQLModel, table=True):
+    """A live prediction re-scored in the background by a candidate model version."""
+    __tablename__ = "shadowpredictions"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # No foreign key: with write-behind the shadow row can land before its
+    # prediction is flushed (or while it sits in a spill file)
+    prediction_id: int = Field(index=True, sa_type=BigInteger)
+    primary_version: str
+    candidate_version: str = Field(index=True)
+    primary_probability: float
+    candidate_probability: float
+    candidate_latency_ms: float
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
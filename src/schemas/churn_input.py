@@ -1,3 +1,5 @@
+import hashlib
+import json
 from pydantic import BaseModel
 
 class ChurnInput(BaseModel):
@@ -25,3 +27,8 @@ class ChurnInput(BaseModel):
     IncomeGroup: str
     Occupation: str
     PrizmCode: str
+
+    def canonical_hash(self) -> str:
+        """SHA-256 of the fields serialized with sorted keys and no whitespace."""
+        payload = json.dumps(self.model_dump(), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
@@ -1,6 +1,12 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, PlainSerializer
+from typing import Annotated, Optional
 from datetime import datetime
+from uuid import UUID
+
+# Snowflake prediction ids exceed 2**53, which JavaScript numbers can't
+# hold exactly, so ids go out as JSON strings (and are accepted as either)
+Id = Annotated[int, PlainSerializer(str, return_type=str, when_used="json")]
+
 
 # --------------------------
 # User schemas
@@ -21,10 +27,10 @@ class UserInDB(User):
     hashed_password: str
 
 class UserOut(BaseModel):
-    id: int
+    id: UUID
     username: str
-    email: str
-    created_at: Optional[str]
+    email: Optional[str]
+    created_at: Optional[datetime]
 
     class Config:
        from_attributes= True  # allow ORM objects (SQLModel) to be returned
@@ -43,22 +49,22 @@ class TokenData(BaseModel):
 
 
 class UserRead(UserBase):
-    id: int
+    id: UUID
     created_at: datetime
 
     class Config:
         from_attributes= True  # Enables ORM -> Pydantic conversion
 
 class FeedbackCreate(BaseModel):
-    prediction_id: int
+    prediction_id: Id
     correct: Optional[bool] = None
     comment: Optional[str] = None
 
 
 class FeedbackRead(BaseModel):
-    id: int
-    prediction_id: int
-    user_id: int
+    id: Id
+    prediction_id: Id
+    user_id: UUID
     correct: Optional[bool]
     comment: Optional[str]
     created_at: datetime
@@ -68,11 +74,11 @@ class FeedbackRead(BaseModel):
 
 
 class MLModelRead(BaseModel):
-    id: int
+    id: Id
     name: str
     version: str
     description: Optional[str]
-    created_at: Optional[str]
+    created_at: Optional[datetime]
 
     class Config:
         from_attributes= True
@@ -87,11 +93,33 @@ class MLModelCreate(BaseModel):
 
 
 class PredictionRead(BaseModel):
-    id: int
-    input_data: str
+    id: Id
+    input_hash: Optional[str] = None
+    input_data: Optional[str]
     prediction: int
     probability: float
+    model_id: Optional[int] = None
+    model_version: Optional[str] = None
     created_at: Optional[datetime]
 
     class Config:
-        from_attributes= True
\ No newline at end of file
+        from_attributes= True
+
+class PredictionLogRead(BaseModel):
+    id: Id
+    prediction_id: Id
+    user_id: UUID
+    request_ip: Optional[str]
+    user_agent: Optional[str]
+    timestamp: datetime
+
+    class Config:
+        from_attributes= True
+
+
+class ModelReloadRequest(BaseModel):
+    version: str
+    model_uri: str
+    fe_uri: str
+    plan_uri: Optional[str] = None
+    threshold: Optional[float] = None
@@ -0,0 +1,22 @@
+import os
+from pathlib import Path
+
+
+def memory_usage() -> dict:
+    """
+    Resident (RSS) and proportional (PSS) set size of this process in MB.
+
+    PSS splits shared pages between the processes mapping them, so it shows
+    how much a worker really costs when artifacts are shared after fork.
+    Values are None where /proc is unavailable.
+    """
+    usage = {"pid": os.getpid(), "rss_mb": None, "pss_mb": None}
+    rollup = Path("/proc/self/smaps_rollup")
+    if not rollup.exists():
+        return usage
+
+    for line in rollup.read_text().splitlines():
+        key, _, value = line.partition(":")
+        if key in ("Rss", "Pss"):
+            usage[f"{key.lower()}_mb"] = round(int(value.split()[0]) / 1024, 1)
+    return usage
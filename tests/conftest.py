@@ -0,0 +1,24 @@
+import os
+import sys
+from pathlib import Path
+
+# The app imports its packages from src/ (PYTHONPATH=/app/src in the image)
+# while tests import them as src.*. Both names must resolve to one models
+# module, or SQLModel would define every table twice.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+# db.database builds its engine at import; it never connects in these tests
+for name, value in {
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_DB": "test",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+}.items():
+    os.environ.setdefault(name, value)
+
+import models  # noqa: E402
+import models.model  # noqa: E402
+
+sys.modules["src.models"] = models
+sys.modules["src.models.model"] = models.model
@@ -0,0 +1,171 @@
+import hashlib
+import os
+import time
+
+import pytest
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceModifiedError
+
+from src.loaders.artifact_cache import ArtifactCache
+from src.loaders.blob_loader import BlobLoader
+
+
+class FakeContentSettings:
+    def __init__(self, content_md5):
+        self.content_md5 = content_md5
+
+
+class FakeProps:
+    def __init__(self, data, etag, md5=None):
+        self.etag = f'"{etag}"'
+        self.content_settings = FakeContentSettings(md5)
+        self.size = len(data)
+
+
+class FakeDownloader:
+    def __init__(self, data):
+        self.data = data
+
+    def readall(self):
+        return self.data
+
+
+class FakeBlob:
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def get_blob_properties(self):
+        data, etag = self.store.blobs[self.name]
+        return FakeProps(data, etag, self.store.md5.get(self.name))
+
+    def download_blob(self, offset=None, length=None, etag=None, match_condition=None):
+        self.store.downloads += 1
+        data, current = self.store.blobs[self.name]
+        if match_condition == MatchConditions.IfNotModified and etag != f'"{current}"':
+            raise ResourceModifiedError("The condition specified using HTTP conditional header(s) is not met.")
+        if offset is not None:
+            self.store.ranges.append((offset, length))
+            data = data[offset:offset + length]
+        return FakeDownloader(data)
+
+
+class FakeBlobService:
+    """Azurite-like stand-in: container -> blob clients backed by a dict."""
+
+    def __init__(self, blobs, md5=None):
+        self.blobs = blobs
+        self.md5 = md5 or {}
+        self.downloads = 0
+        self.ranges = []
+
+    def get_container_client(self, name):
+        return self
+
+    def get_blob_client(self, name):
+        return FakeBlob(self, name)
+
+
+def test_cache_hit_skips_download(tmp_path):
+    service = FakeBlobService({"models/model.pkl": (b"forest-v1", "etag-1")})
+    loader = BlobLoader(client=service, container_name="ml", cache=ArtifactCache(str(tmp_path / "cache")))
+
+    first = loader.download("models/model.pkl", str(tmp_path / "model.pkl"))
+    second = loader.download("models/model.pkl", str(tmp_path / "model.pkl"))
+
+    assert first == second
+    assert open(first, "rb").read() == b"forest-v1"
+    assert service.downloads == 1
+
+
+def test_changed_blob_is_downloaded_again(tmp_path):
+    service = FakeBlobService({"models/model.pkl": (b"forest-v1", "etag-1")})
+    loader = BlobLoader(client=service, container_name="ml", cache=ArtifactCache(str(tmp_path / "cache")))
+    loader.download("models/model.pkl", str(tmp_path / "model.pkl"))
+
+    service.blobs["models/model.pkl"] = (b"forest-v2", "etag-2")
+    path = loader.download("models/model.pkl", str(tmp_path / "model.pkl"))
+
+    assert open(path, "rb").read() == b"forest-v2"
+    assert service.downloads == 2
+
+
+def test_without_cache_writes_local_path(tmp_path):
+    service = FakeBlobService({"fe.joblib": (b"fe-bytes", "e")})
+    loader = BlobLoader(client=service, container_name="ml", cache=None)
+
+    path = loader.download("fe.joblib", str(tmp_path / "out" / "fe.joblib"))
+    assert path == str(tmp_path / "out" / "fe.joblib")
+    assert open(path, "rb").read() == b"fe-bytes"
+    assert not [p for p in os.listdir(tmp_path / "out") if p.startswith(".tmp-")]
+
+
+def test_eviction_keeps_cache_under_budget(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_bytes=250)
+    paths = []
+    for i in range(4):
+        paths.append(cache.put(f"blob-{i}", "v", lambda f: f.write(b"x" * 100)))
+        os.utime(paths[-1], (time.time() + i, time.time() + i))
+
+    remaining = [p for p in paths if os.path.exists(p)]
+    assert remaining == paths[-2:]
+
+
+def test_failed_write_leaves_no_entry(tmp_path):
+    cache = ArtifactCache(str(tmp_path))
+
+    def broken(f):
+        f.write(b"partial")
+        raise IOError("connection reset")
+
+    try:
+        cache.put("blob", "v", broken)
+    except IOError:
+        pass
+    assert cache.get("blob", "v") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_ranged_parallel_download_reassembles_in_order(tmp_path):
+    data = os.urandom(10_000)
+    service = FakeBlobService({"big.pkl": (data, "e")}, md5={"big.pkl": hashlib.md5(data).digest()})
+    loader = BlobLoader(client=service, container_name="ml", cache=None)
+    loader.chunk_size = 1024
+    loader.concurrency = 3
+
+    path = loader.download("big.pkl", str(tmp_path / "big.pkl"))
+
+    assert open(path, "rb").read() == data
+    assert sorted(service.ranges) == [(o, min(1024, 10_000 - o)) for o in range(0, 10_000, 1024)]
+
+
+def test_md5_mismatch_is_rejected(tmp_path):
+    data = b"a" * 3000
+    service = FakeBlobService({"model.pkl": (data, "e")}, md5={"model.pkl": hashlib.md5(b"other").digest()})
+    loader = BlobLoader(client=service, container_name="ml", cache=ArtifactCache(str(tmp_path / "cache")))
+    loader.chunk_size = 1000
+
+    with pytest.raises(IOError):
+        loader.download("model.pkl", str(tmp_path / "model.pkl"))
+    assert os.listdir(tmp_path / "cache") == []
+
+
+def test_overwrite_during_download_is_rejected(tmp_path):
+    service = FakeBlobService({"model.pkl": (b"a" * 3000, "etag-1")})
+    loader = BlobLoader(client=service, container_name="ml", cache=ArtifactCache(str(tmp_path / "cache")))
+    loader.chunk_size = 1000
+    loader.concurrency = 1
+    blob = service.get_blob_client("model.pkl")
+    download = blob.download_blob
+
+    def overwritten_after_first_range(**kwargs):
+        chunk = download(**kwargs)
+        service.blobs["model.pkl"] = (b"b" * 3000, "etag-2")
+        return chunk
+
+    blob.download_blob = overwritten_after_first_range
+    service.get_blob_client = lambda name: blob
+
+    with pytest.raises(IOError):
+        loader.download("model.pkl", str(tmp_path / "model.pkl"))
+    assert os.listdir(tmp_path / "cache") == []
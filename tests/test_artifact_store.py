@@ -0,0 +1,59 @@
+import pytest
+
+from src.loaders import artifact_store
+from src.loaders.artifact_store import AzureBlobArtifactStore, LocalArtifactStore
+
+
+def test_file_uri_resolves_to_local_store(tmp_path):
+    model = tmp_path / "model.pkl"
+    model.write_bytes(b"model")
+
+    store, path = artifact_store.resolve(f"file://{model}")
+
+    assert isinstance(store, LocalArtifactStore)
+    assert path == str(model)
+    assert artifact_store.fetch(f"file://{model}", "/unused") == str(model)
+
+
+def test_local_store_can_copy(tmp_path):
+    src = tmp_path / "fe.joblib"
+    src.write_bytes(b"fe")
+    dest = tmp_path / "out" / "fe.joblib"
+
+    assert LocalArtifactStore(copy=True).fetch(str(src), str(dest)) == str(dest)
+    assert dest.read_bytes() == b"fe"
+
+
+def test_local_store_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        LocalArtifactStore().fetch(str(tmp_path / "nope.pkl"), "/unused")
+
+
+def test_azure_uris_share_a_store_per_container():
+    store, path = artifact_store.resolve("az://models/mlflow/1/model.pkl")
+    assert isinstance(store, AzureBlobArtifactStore)
+    assert store.container_name == "models"
+    assert path == "mlflow/1/model.pkl"
+    assert artifact_store.resolve("azure://models/other.pkl")[0] is store
+
+    # Bare paths keep their old meaning: blobs in the default container
+    default, path = artifact_store.resolve("mlflow/1/model.pkl")
+    assert default.container_name is None
+    assert path == "mlflow/1/model.pkl"
+
+
+def test_azure_store_delegates_to_loader():
+    class Loader:
+        def download(self, blob_path, local_path):
+            return f"{local_path}<-{blob_path}"
+
+    store = AzureBlobArtifactStore("models", loader=Loader())
+    assert store.fetch("a/model.pkl", "/tmp/model.pkl") == "/tmp/model.pkl<-a/model.pkl"
+
+
+def test_unknown_scheme():
+    with pytest.raises(ValueError, match="Unsupported artifact URI scheme: 's3'"):
+        artifact_store.resolve("s3://bucket/model.pkl")
+    with pytest.raises(ValueError, match="s3://bucket/model.pkl"):
+        artifact_store.fetch("s3://bucket/model.pkl", "/unused")
+
@@ -0,0 +1,104 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.ml.batcher import Histogram, MicroBatcher
+
+
+def make_score_fn(calls):
+    def score(X):
+        calls.append(len(X))
+        probs = X[:, 0] / 10.0
+        return (probs >= 0.5).astype(int), probs
+    return score
+
+
+def test_concurrent_requests_share_one_call():
+    calls = []
+    batcher = MicroBatcher(make_score_fn(calls), max_batch_size=64, max_wait_ms=20)
+
+    async def main():
+        rows = [np.array([[float(i)]]) for i in range(8)]
+        results = await asyncio.gather(*(batcher.submit(r) for r in rows))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(main())
+
+    assert calls == [8]
+    for i, (labels, probs) in enumerate(results):
+        assert probs.tolist() == [i / 10.0]
+        assert labels.tolist() == [int(i >= 5)]
+    stats = batcher.stats()
+    assert stats["batch_size"]["count"] == 1
+    assert stats["queue_wait_ms"]["count"] == 8
+
+
+def test_batch_is_flushed_at_max_rows():
+    calls = []
+    batcher = MicroBatcher(make_score_fn(calls), max_batch_size=4, max_wait_ms=50)
+
+    async def main():
+        rows = [np.array([[1.0], [2.0]]) for _ in range(4)]
+        results = await asyncio.gather(*(batcher.submit(r) for r in rows))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(main())
+
+    assert calls == [4, 4]
+    assert all(len(probs) == 2 for _, probs in results)
+
+
+def test_errors_reach_every_caller():
+    def failing(X):
+        raise RuntimeError("model exploded")
+
+    batcher = MicroBatcher(failing, max_wait_ms=5)
+
+    async def main():
+        results = await asyncio.gather(
+            batcher.submit(np.zeros((1, 1))),
+            batcher.submit(np.zeros((1, 1))),
+            return_exceptions=True,
+        )
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_histogram_buckets():
+    hist = Histogram([1, 5, 10])
+    for value in (0.5, 1, 3, 10, 50):
+        hist.observe(value)
+    snap = hist.snapshot()
+    assert snap["counts"] == [2, 1, 1, 1]
+    assert snap["count"] == 5
+    assert snap["mean"] == pytest.approx(64.5 / 5)
+
+
+def test_requests_for_different_bundles_are_not_mixed():
+    calls = []
+
+    def score(X, bundle):
+        calls.append((bundle, len(X)))
+        probs = X[:, 0] * bundle
+        return (probs >= 0.5).astype(int), probs
+
+    batcher = MicroBatcher(score, max_batch_size=64, max_wait_ms=20)
+
+    async def main():
+        row = np.array([[1.0]])
+        results = await asyncio.gather(
+            batcher.submit(row, 0.1), batcher.submit(row, 0.1), batcher.submit(row, 0.9)
+        )
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(main())
+
+    assert calls == [(0.1, 2), (0.9, 1)]
+    assert [probs.tolist() for _, probs in results] == [[0.1], [0.1], [0.9]]
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler
+
+from src.ml.feature_plan import FeaturePlan, BINARY_FEATURES, BINARY_MAPPING, LOW_CARD_FEATURES
+
+
+def make_raw_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "MonthlyRevenue": rng.normal(60, 20, n),
+        "MonthlyMinutes": rng.normal(500, 100, n),
+        "InboundCalls": rng.integers(0, 50, n),
+        "OutboundCalls": rng.integers(0, 50, n),
+        "MonthsInService": rng.integers(1, 60, n),
+        "RespondsToMailOffers": rng.choice(["Yes", "No"], n),
+        "MadeCallToRetentionTeam": rng.choice(["Yes", "No"], n),
+        "CreditRating": rng.choice(["1-Highest", "2-High", "3-Good"], n),
+        "IncomeGroup": rng.choice(["0", "3", "7"], n).astype(str),
+        "Occupation": rng.choice(["Professional", "Crafts", "Other"], n),
+        "PrizmCode": rng.choice(["Suburban", "Town", "Rural"], n),
+    })
+
+
+def training_pipeline(train_df):
+    """Reference: the original pandas/sklearn pipeline, fitted once on training."""
+    df = train_df.copy()
+    df["TotalCalls"] = df["InboundCalls"] + df["OutboundCalls"]
+    df = df.drop(columns=["InboundCalls", "OutboundCalls"])
+    cat = BINARY_FEATURES + LOW_CARD_FEATURES
+    num = [c for c in df.columns if c not in cat]
+
+    num_imputer = SimpleImputer(strategy="median").fit(df[num])
+    cat_imputer = SimpleImputer(strategy="most_frequent").fit(df[cat])
+    categories = {c: sorted(df[c].unique()) for c in LOW_CARD_FEATURES}
+
+    def encode(frame):
+        frame = frame.copy()
+        frame["TotalCalls"] = frame["InboundCalls"] + frame["OutboundCalls"]
+        frame = frame.drop(columns=["InboundCalls", "OutboundCalls"])
+        frame[num] = num_imputer.transform(frame[num])
+        frame[cat] = cat_imputer.transform(frame[cat])
+        for c in BINARY_FEATURES:
+            frame[c] = frame[c].map(BINARY_MAPPING).astype(int)
+        # Pin the training categories so drop_first drops the same level for any batch
+        for c in LOW_CARD_FEATURES:
+            frame[c] = pd.Categorical(frame[c], categories=categories[c])
+        onehot = pd.get_dummies(frame[LOW_CARD_FEATURES], drop_first=True)
+        return pd.concat([frame.drop(columns=LOW_CARD_FEATURES), onehot], axis=1)
+
+    encoded = encode(train_df)
+    columns = list(encoded.columns)
+    scaled_cols = num + BINARY_FEATURES
+    scaler = StandardScaler().fit(encoded[scaled_cols])
+
+    def transform(frame):
+        out = encode(frame).reindex(columns=columns, fill_value=0).astype(float)
+        out[scaled_cols] = scaler.transform(out[scaled_cols])
+        return out.to_numpy()
+
+    return columns, transform
+
+
+def test_plan_matches_training_pipeline():
+    train = make_raw_frame(500)
+    columns, reference = training_pipeline(train)
+    plan = FeaturePlan.fit(train, columns)
+
+    rows = make_raw_frame(20, seed=1)
+    expected = reference(rows)
+    actual = plan.transform(rows.to_dict(orient="records"))
+
+    assert actual.shape == (20, len(columns))
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_single_row_does_not_refit():
+    train = make_raw_frame(500)
+    columns, reference = training_pipeline(train)
+    plan = FeaturePlan.fit(train, columns)
+
+    row = make_raw_frame(1, seed=3)
+    # A refit scaler would map every column of a single row to 0
+    actual = plan.transform(row.to_dict(orient="records"))
+    assert np.abs(actual).sum() > 0
+    np.testing.assert_allclose(actual, reference(row), atol=1e-9)
+
+
+def test_missing_values_use_training_statistics():
+    train = make_raw_frame(500)
+    columns, _ = training_pipeline(train)
+    plan = FeaturePlan.fit(train, columns)
+
+    record = make_raw_frame(1, seed=4).to_dict(orient="records")[0]
+    record["MonthlyRevenue"] = None
+    record["CreditRating"] = None
+    X = plan.transform([record])
+
+    j = columns.index("MonthlyRevenue")
+    expected = (plan.medians["MonthlyRevenue"] - plan.means["MonthlyRevenue"]) / plan.stds["MonthlyRevenue"]
+    assert X[0, j] == pytest.approx(expected)
+
+
+def test_plan_round_trips_through_json(tmp_path):
+    train = make_raw_frame(200)
+    columns, _ = training_pipeline(train)
+    plan = FeaturePlan.fit(train, columns)
+
+    path = plan.save(str(tmp_path / "feature_plan.json"))
+    loaded = FeaturePlan.load(path)
+
+    rows = make_raw_frame(5, seed=2).to_dict(orient="records")
+    np.testing.assert_array_equal(loaded.transform(rows), plan.transform(rows))
+
+
+def test_transform_writes_into_preallocated_buffer():
+    train = make_raw_frame(200)
+    columns, _ = training_pipeline(train)
+    plan = FeaturePlan.fit(train, columns)
+
+    buf = np.full((3, plan.n_features), 99.0, dtype=np.float32)
+    rows = make_raw_frame(3, seed=5).to_dict(orient="records")
+    out = plan.transform(rows, out=buf)
+
+    assert out is buf
+    np.testing.assert_allclose(out, plan.transform(rows), rtol=1e-5, atol=1e-5)
+
+
+class _FrameFeatureEngineer:
+    """Stand-in for the pickled feature engineer: DataFrame in, matrix out."""
+
+    def __init__(self, plan, shift=0.0):
+        self.plan = plan
+        self.shift = shift
+
+    def transform(self, df):
+        X = self.plan.transform(df.to_dict(orient="records"))
+        return pd.DataFrame(X + self.shift, columns=self.plan.columns)
+
+
+def test_parity_check_accepts_matching_feature_engineer():
+    from src.ml.parity import check_feature_parity
+
+    train = make_raw_frame(300)
+    columns, _ = training_pipeline(train)
+    plan = FeaturePlan.fit(train, columns)
+
+    assert check_feature_parity(plan, _FrameFeatureEngineer(plan))
+    assert check_feature_parity(plan, _FrameFeatureEngineer(plan), dtype=np.float32)
+
+
+def test_parity_check_rejects_divergent_feature_engineer():
+    from src.ml.parity import check_feature_parity
+
+    train = make_raw_frame(300)
+    columns, _ = training_pipeline(train)
+    plan = FeaturePlan.fit(train, columns)
+
+    assert not check_feature_parity(plan, _FrameFeatureEngineer(plan, shift=1e-2))
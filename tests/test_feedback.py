@@ -5,18 +5,19 @@ from src.main import app
 from src.db.database import get_session
 from src.models.model import UserRole, User
 from unittest.mock import MagicMock
+from uuid import uuid4
 from src.controllers.middleware.auth import get_current_user
 
 client = TestClient(app)
 
 admin_user = User(
-    id=1,
+    id=uuid4(),
     username="admin",
     roles=[MagicMock(role=MagicMock(name="admin"))],
     role=UserRole.ADMIN
 )
 normal_user = User(
-    id=2,
+    id=uuid4(),
     username="user",
     roles=[MagicMock(role=MagicMock(name="user"))],
     role=UserRole.USER
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.utils import ids
+
+
+def test_ids_are_unique_and_increasing():
+    gen = ids.SnowflakeGenerator(7)
+    batch = gen.next_ids(10_000)
+    assert batch == sorted(batch)
+    assert len(set(batch)) == len(batch)
+    assert all(0 < i < 2 ** 63 for i in batch)
+
+
+def test_node_id_is_encoded_and_bounded():
+    gen = ids.SnowflakeGenerator(ids.MAX_NODE)
+    assert (gen.next_id() >> ids.SEQUENCE_BITS) & ids.MAX_NODE == ids.MAX_NODE
+    with pytest.raises(ValueError):
+        ids.SnowflakeGenerator(ids.MAX_NODE + 1)
+
+
+def test_ids_from_different_nodes_differ():
+    a = ids.SnowflakeGenerator(1).next_ids(100)
+    b = ids.SnowflakeGenerator(2).next_ids(100)
+    assert not set(a) & set(b)
+
+
+def test_timestamp_round_trip():
+    before = datetime.now(timezone.utc) - timedelta(milliseconds=1)
+    snowflake = ids.SnowflakeGenerator(0).next_id()
+    after = datetime.now(timezone.utc) + timedelta(milliseconds=1)
+    assert before <= ids.timestamp_of(snowflake) <= after
+    assert ids.min_id_at(before) <= snowflake < ids.min_id_at(after)
+
+
+def test_ids_are_sent_as_json_strings():
+    from src.schemas.schema import FeedbackCreate, PredictionRead
+
+    snowflake = ids.SnowflakeGenerator(3).next_id()
+    assert snowflake > 2 ** 53
+    read = PredictionRead(id=snowflake, input_data=None, prediction=1, probability=0.5, created_at=None)
+    assert read.model_dump(mode="json")["id"] == str(snowflake)
+    assert read.model_dump()["id"] == snowflake
+    assert FeedbackCreate(prediction_id=str(snowflake)).prediction_id == snowflake
@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.ml.inference import cache_version, score
+
+
+def test_labels_match_predict_at_the_default_threshold():
+    # Duplicate rows with both labels put x=0 in a leaf with probability exactly 0.5
+    X = np.array([[0.0], [0.0], [1.0], [1.0], [2.0], [2.0]])
+    y = np.array([0, 1, 1, 1, 0, 0])
+    model = RandomForestClassifier(n_estimators=1, bootstrap=False, random_state=0).fit(X, y)
+    probs = model.predict_proba(X)[:, 1]
+    assert 0.5 in probs
+
+    labels, scored = score(X, SimpleNamespace(scorer=model, threshold=0.5))
+
+    np.testing.assert_array_equal(scored, probs)
+    np.testing.assert_array_equal(labels, model.predict(X))
+
+
+def test_cache_version_changes_with_threshold_and_reload():
+    bundle = SimpleNamespace(name="churn", version="3", threshold=0.5, loaded_at=100.0)
+    assert cache_version(bundle) == cache_version(SimpleNamespace(**vars(bundle)))
+    assert cache_version(bundle) != cache_version(SimpleNamespace(**{**vars(bundle), "threshold": 0.6}))
+    assert cache_version(bundle) != cache_version(SimpleNamespace(**{**vars(bundle), "loaded_at": 101.0}))
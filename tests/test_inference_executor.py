@@ -0,0 +1,45 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.ml.executor import ExecutorSaturated, InferenceExecutor
+
+
+def test_rejects_beyond_max_pending():
+    executor = InferenceExecutor(max_workers=1, max_pending=2, retry_after=3)
+    release = threading.Event()
+
+    async def call():
+        with executor.admit():
+            return await executor.run(release.wait, 5)
+
+    async def main():
+        tasks = [asyncio.create_task(call()) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorSaturated) as exc:
+            await call()
+        release.set()
+        await asyncio.gather(*tasks)
+        return exc.value
+
+    err = asyncio.run(main())
+    executor.shutdown()
+
+    assert err.retry_after == 3
+    stats = executor.stats()
+    assert stats["admitted"] == 2
+    assert stats["rejected"] == 1
+    assert stats["pending"] == 0
+
+
+def test_runs_work_on_dedicated_threads():
+    executor = InferenceExecutor(max_workers=1)
+
+    async def main():
+        with executor.admit():
+            return await executor.run(lambda: threading.current_thread().name)
+
+    name = asyncio.run(main())
+    executor.shutdown()
+    assert name.startswith("inference")
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, MetaData, Table, select
+from sqlalchemy.dialects.postgresql import JSONB, psycopg2
+
+from src.db.types import JSONText
+
+dialect = psycopg2.dialect()
+table = Table("t", MetaData(), Column("id", Integer), Column("data", JSONText))
+
+
+def test_select_reads_json_as_text():
+    sql = str(select(table).compile(dialect=dialect))
+    assert "CAST(t.data AS TEXT)" in sql
+
+
+def test_column_is_jsonb_and_binds_dicts_or_strings():
+    assert isinstance(JSONText().load_dialect_impl(dialect), JSONB)
+    bind = JSONText().process_bind_param
+    assert bind('{"a": 1}', dialect) == {"a": 1}
+    assert bind({"a": 1}, dialect) == {"a": 1}
@@ -0,0 +1,272 @@
+import gc
+import pickle
+import time
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from src.loaders import artifact_store
+from src.loaders.model_loader import LoadBackoff, ModelArtifacts, preload_artifacts, smoke_test
+from src.models.model import MLModel
+
+
+class NaNModel:
+    n_features_in_ = 4
+
+    def predict_proba(self, X):
+        return np.full((len(X), 2), np.nan)
+
+
+@pytest.fixture
+def artifacts(tmp_path, monkeypatch):
+    model_ids = {}
+    monkeypatch.setattr(
+        ModelArtifacts, "resolve_model_id",
+        lambda name, version: model_ids.setdefault((name, version), len(model_ids) + 1),
+    )
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 4))
+    y = (X[:, 0] > 0).astype(int)
+
+    paths = {}
+    for version, seed in (("1", 0), ("2", 1)):
+        model = RandomForestClassifier(n_estimators=5, random_state=seed).fit(X, y)
+        paths[version] = tmp_path / f"model-{version}.pkl"
+        paths[version].write_bytes(pickle.dumps(model))
+    paths["bad"] = tmp_path / "model-bad.pkl"
+    paths["bad"].write_bytes(pickle.dumps(NaNModel()))
+    fe = tmp_path / "fe.joblib"
+    fe.write_bytes(pickle.dumps({"unused": True}))
+
+    reset()
+    ModelArtifacts.current = ModelArtifacts._remember(
+        ModelArtifacts.build("1", f"file://{paths['1']}", f"file://{fe}")
+    )
+    yield {k: f"file://{v}" for k, v in paths.items()}, f"file://{fe}"
+    reset()
+
+
+def reset():
+    ModelArtifacts.current = ModelArtifacts.previous = None
+    ModelArtifacts.bundles.clear()
+    ModelArtifacts.sources.clear()
+    ModelArtifacts.failed_loads.clear()
+    ModelArtifacts.evictions = 0
+
+
+def test_reload_swaps_bundle_and_keeps_previous(artifacts):
+    models, fe = artifacts
+    old = ModelArtifacts.bundle()
+
+    report = ModelArtifacts.reload("2", models["2"], fe)
+
+    assert report["version"] == "2"
+    assert ModelArtifacts.bundle().version == "2"
+    assert ModelArtifacts.previous is old
+    # A request holding the old bundle keeps scoring with it
+    assert old.version == "1" and old.scorer is old.model
+    assert ModelArtifacts.status()["previous"]["version"] == "1"
+
+    assert ModelArtifacts.rollback() is old
+    assert ModelArtifacts.bundle().version == "1"
+
+
+def test_failed_smoke_test_keeps_live_bundle(artifacts):
+    models, fe = artifacts
+    live = ModelArtifacts.bundle()
+
+    with pytest.raises(ValueError):
+        ModelArtifacts.reload("3", models["bad"], fe)
+
+    assert ModelArtifacts.bundle() is live
+    assert ModelArtifacts.previous is None
+
+
+def test_rollback_window_expires(artifacts, monkeypatch):
+    models, fe = artifacts
+    ModelArtifacts.reload("2", models["2"], fe)
+    monkeypatch.setattr(ModelArtifacts, "previous_until", time.monotonic() - 1)
+
+    with pytest.raises(LookupError):
+        ModelArtifacts.rollback()
+    assert ModelArtifacts.previous is None
+    assert ModelArtifacts.bundle().version == "2"
+
+
+def test_smoke_test_reports_timing(artifacts):
+    report = smoke_test(ModelArtifacts.bundle(), n=8)
+    assert report["probes"] == 8
+    assert report["elapsed_ms"] >= 0
+
+
+def test_candidate_versions_load_lazily_side_by_side(artifacts):
+    models, fe = artifacts
+    ModelArtifacts.register("2", models["2"], fe)
+    assert len(ModelArtifacts.bundles) == 1  # registered, not loaded yet
+
+    candidate = ModelArtifacts.get("2")
+
+    assert candidate.version == "2"
+    assert ModelArtifacts.get("2") is candidate
+    assert candidate.model_id != ModelArtifacts.bundle().model_id
+    assert ModelArtifacts.get() is ModelArtifacts.bundle()
+    assert ModelArtifacts.bundle().version == "1"
+    with pytest.raises(LookupError):
+        ModelArtifacts.get("99")
+
+
+def test_uri_templates(artifacts, monkeypatch):
+    models, fe = artifacts
+    monkeypatch.setenv("MODEL_URI_TEMPLATE", models["2"].replace("model-2", "model-{version}"))
+    monkeypatch.setenv("FE_URI_TEMPLATE", fe)
+
+    assert ModelArtifacts.get("2").source["model_uri"] == models["2"]
+
+
+def test_memory_budget_evicts_least_recently_used(artifacts, monkeypatch):
+    models, fe = artifacts
+    live = ModelArtifacts.bundle()
+    for version in ("2", "3"):
+        ModelArtifacts.register(version, models["2"], fe)
+    candidate = ModelArtifacts.get("2")
+    monkeypatch.setattr(ModelArtifacts, "max_bytes", live.nbytes + candidate.nbytes)
+
+    ModelArtifacts.get("3")
+
+    loaded = [version for _, version in ModelArtifacts.bundles]
+    assert loaded == ["1", "3"]  # live bundle is pinned, "2" was least recent
+    assert ModelArtifacts.evictions == 1
+
+
+def test_failed_candidate_backs_off_until_retry(artifacts, monkeypatch):
+    models, fe = artifacts
+    builds = []
+    build = ModelArtifacts.build
+    monkeypatch.setattr(ModelArtifacts, "build", lambda *a, **kw: (builds.append(kw["version"]), build(*a, **kw))[1])
+    monkeypatch.setattr(ModelArtifacts, "load_retry_seconds", 60)
+    ModelArtifacts.register("3", models["bad"], fe)
+    key = (ModelArtifacts.model_name, "3")
+
+    with pytest.raises(ValueError):
+        ModelArtifacts.get("3")
+    with pytest.raises(LoadBackoff):
+        ModelArtifacts.get("3")
+    assert builds == ["3"]  # skipped, not fetched again
+
+    # Backoff over: retried, and the next wait is twice as long
+    failures, retry_at, _ = ModelArtifacts.failed_loads[key]
+    ModelArtifacts.failed_loads[key] = (failures, time.monotonic(), "earlier")
+    with pytest.raises(ValueError):
+        ModelArtifacts.get("3")
+    failures, retry_at, _ = ModelArtifacts.failed_loads[key]
+    assert failures == 2 and retry_at - time.monotonic() > 60
+    assert builds == ["3", "3"]
+
+    # A control file change retries right away
+    ModelArtifacts.forget_failed_loads()
+    with pytest.raises(ValueError):
+        ModelArtifacts.get("3")
+    assert builds == ["3", "3", "3"]
+
+    # So does registering new artifacts for the version
+    ModelArtifacts.register("3", models["2"], fe)
+    assert ModelArtifacts.get("3").version == "3"
+    assert key not in ModelArtifacts.failed_loads
+
+
+def test_unknown_versions_leave_no_locks_behind(artifacts):
+    for i in range(1000):
+        with pytest.raises(LookupError):
+            ModelArtifacts.get(f"bogus-{i}")
+    assert ModelArtifacts._load_locks == {}
+
+
+@pytest.mark.parametrize("version", ["../1", "1/../../etc", "..", ".hidden", "a b", ""])
+def test_invalid_versions_never_fill_uri_templates(artifacts, monkeypatch, version):
+    models, fe = artifacts
+    monkeypatch.setenv("MODEL_URI_TEMPLATE", "file:///models/{version}/model.pkl")
+    monkeypatch.setenv("FE_URI_TEMPLATE", fe)
+    monkeypatch.setattr(ModelArtifacts, "build", lambda *a, **kw: pytest.fail("built an invalid version"))
+
+    with pytest.raises(LookupError):
+        ModelArtifacts.get(version)
+    assert ModelArtifacts._load_locks == {}
+
+
+def test_failed_loads_are_capped(artifacts, monkeypatch):
+    models, fe = artifacts
+    monkeypatch.setattr(ModelArtifacts, "max_failed_loads", 3)
+    monkeypatch.setenv("MODEL_URI_TEMPLATE", models["bad"].replace("model-bad", "model-bad{version}"))
+    monkeypatch.setenv("FE_URI_TEMPLATE", fe)
+    for version in ("a", "b", "c", "d", "e"):
+        with pytest.raises(FileNotFoundError):
+            ModelArtifacts.get(version)
+
+    assert [version for _, version in ModelArtifacts.failed_loads] == ["c", "d", "e"]
+    assert ModelArtifacts._load_locks == {}
+
+
+def test_local_paths_are_per_model_and_version(artifacts, monkeypatch):
+    models, fe = artifacts
+    fetch, dests = artifact_store.fetch, []
+    monkeypatch.setattr(artifact_store, "fetch", lambda uri, dest: (dests.append(dest), fetch(uri, dest))[1])
+    monkeypatch.setenv("LOCAL_MODEL_PATH", "/cache/model.pkl")
+
+    ModelArtifacts.build("2", models["2"], fe)
+    ModelArtifacts.build("2", models["2"], fe, name="Churn_GBM")
+    ModelArtifacts.build("2", models["2"], fe, name="../Churn GBM")
+
+    local_models = [dest for dest in dests if dest.startswith("/cache/")]
+    assert local_models == [
+        f"/cache/model.pkl.{ModelArtifacts.model_name}.v2",
+        "/cache/model.pkl.Churn_GBM.v2",
+        "/cache/model.pkl..._Churn_GBM.v2",
+    ]
+
+def test_preload_loads_bundle_before_workers_start(artifacts, monkeypatch):
+    models, fe = artifacts
+    reset()
+    monkeypatch.setenv("MODEL_URI", models["2"])
+    monkeypatch.setenv("FE_URI", fe)
+    build, builds = ModelArtifacts.build, []
+    monkeypatch.setattr(ModelArtifacts, "build", lambda *a, **kw: (builds.append(kw["version"]), build(*a, **kw))[1])
+    engine = create_engine("sqlite://")
+
+    monkeypatch.setenv("PRELOAD_ARTIFACTS", "0")
+    assert preload_artifacts(engine) is None
+    assert ModelArtifacts.current is None
+
+    monkeypatch.setenv("PRELOAD_ARTIFACTS", "1")
+    try:
+        report = preload_artifacts(engine)
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+    assert set(report) == {"pid", "rss_mb", "pss_mb"}
+    assert ModelArtifacts.bundle().source["model_uri"] == models["2"]
+    # The worker's startup load finds the preloaded bundle and builds nothing
+    ModelArtifacts.load()
+    assert builds == [ModelArtifacts.version]
+
+def test_resolve_model_id_registers_each_version_once():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=[MLModel.__table__])
+    with Session(engine) as session:
+        existing = MLModel(name="churn", version="1", description="registered by training")
+        session.add(existing)
+        session.commit()
+        existing_id = existing.id
+
+    assert ModelArtifacts.resolve_model_id("churn", "1", engine=engine) == existing_id
+    new_id = ModelArtifacts.resolve_model_id("churn", "2", engine=engine)
+    assert new_id != existing_id
+    assert ModelArtifacts.resolve_model_id("churn", "2", engine=engine) == new_id
+    assert ModelArtifacts.resolve_model_id("other", "2", engine=engine) not in (existing_id, new_id)
+
+    with Session(engine) as session:
+        rows = session.exec(select(MLModel.name, MLModel.version).order_by(MLModel.id)).all()
+    assert rows == [("churn", "1"), ("churn", "2"), ("other", "2")]
@@ -0,0 +1,89 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from src.controllers.pagination import Page, Projection, _ndjson, paginate, project, rows_as
+from src.models.model import MLModel, User
+from src.schemas.schema import MLModelRead, UserOut
+
+
+def reads(schema):
+    return lambda session, rows: [schema.model_validate(r) for r in rows]
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=[MLModel.__table__, User.__table__])
+    with Session(engine) as session:
+        for i in range(5):
+            session.add(MLModel(name="churn", version=str(i), description=None))
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for i in range(5):
+            # Two users share a signup time; the id breaks the tie
+            session.add(User(username=f"u{i}", hashed_password="x", created_at=start + timedelta(minutes=i // 2)))
+        session.commit()
+        yield session
+
+
+def walk(session, stmt, keys, schema, limit):
+    pages, cursor = [], None
+    while True:
+        response = Response()
+        page = paginate(session, stmt, keys, Page(limit=limit, cursor=cursor, stream=False), response, reads(schema))
+        pages.append(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+
+def test_pages_are_bounded_and_cover_every_row_once(session):
+    pages = walk(session, select(MLModel), [MLModel.id], MLModelRead, limit=2)
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert [m.version for p in pages for m in p] == ["0", "1", "2", "3", "4"]
+
+
+def test_composite_keys_page_through_ties(session):
+    pages = walk(session, select(User), [User.created_at, User.id], UserOut, limit=1)
+    names = [u.username for p in pages for u in p]
+    assert sorted(names) == [f"u{i}" for i in range(5)]
+    assert len(pages) == 5
+
+
+def test_stream_yields_ndjson_after_the_cursor(session):
+    response = Response()
+    first = paginate(session, select(MLModel), [MLModel.id], Page(limit=2, cursor=None, stream=False), response, reads(MLModelRead))
+    stmt = select(MLModel).order_by(MLModel.id).where(MLModel.id > first[-1].id)
+    lines = "".join(_ndjson(session, stmt, reads(MLModelRead))).splitlines()
+    assert [json.loads(line)["version"] for line in lines] == ["2", "3", "4"]
+
+
+def test_invalid_cursor_is_a_client_error(session):
+    with pytest.raises(HTTPException) as e:
+        paginate(session, select(MLModel), [MLModel.id], Page(limit=2, cursor="nope", stream=False), Response(), reads(MLModelRead))
+    assert e.value.status_code == 400
+
+
+def test_projection_selects_only_requested_columns(session):
+    names = Projection(fields="version, name").names(MLModelRead.model_fields)
+    stmt = project(MLModel, names, [MLModel.id])
+    assert "description" not in str(stmt)
+
+    response = Response()
+    page = paginate(session, stmt, [MLModel.id], Page(limit=2, cursor=None, stream=False), response, rows_as(names, MLModelRead), projected=True)
+    assert json.loads(page.body) == [{"version": "0", "name": "churn"}, {"version": "1", "name": "churn"}]
+
+    cursor = page.headers["X-Next-Cursor"]
+    rest = paginate(session, stmt, [MLModel.id], Page(limit=5, cursor=cursor, stream=False), Response(), rows_as(names, MLModelRead), projected=True)
+    assert [r["version"] for r in json.loads(rest.body)] == ["2", "3", "4"]
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(HTTPException) as e:
+        Projection(fields="id,secret").names(MLModelRead.model_fields)
+    assert e.value.status_code == 400
+    assert Projection(fields=None).names(MLModelRead.model_fields) is None
@@ -0,0 +1,143 @@
+import asyncio
+
+from src.ml.cache import PredictionCache
+
+
+def test_hit_after_put():
+    cache = PredictionCache()
+    assert cache.get("a", "1") is None
+    cache.put("a", "1", (1, 0.9))
+    assert cache.get("a", "1") == (1, 0.9)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction_by_entry_count():
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", "1", (0, 0.1))
+    cache.put("b", "1", (0, 0.2))
+    cache.get("a", "1")  # a becomes most recently used
+    cache.put("c", "1", (1, 0.7))
+
+    assert cache.get("b", "1") is None
+    assert cache.get("a", "1") == (0, 0.1)
+    assert cache.evictions == 1
+
+
+def test_eviction_by_byte_budget():
+    probe = PredictionCache()
+    probe.put("key-0", "1", (0, 0.5))
+    entry_bytes = probe.stats()["bytes"]
+
+    cache = PredictionCache(max_bytes=entry_bytes * 3)
+    for i in range(10):
+        cache.put(f"key-{i}", "1", (0, 0.5))
+    assert len(cache) == 3
+    assert cache.evictions == 7
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.ml.cache.time.monotonic", lambda: now[0])
+    cache = PredictionCache(ttl_seconds=10)
+    cache.put("a", "1", (1, 0.8))
+    now[0] += 11
+    assert cache.get("a", "1") is None
+    assert cache.expirations == 1
+
+
+def test_model_version_change_invalidates():
+    cache = PredictionCache()
+    cache.put("a", "1", (1, 0.8))
+    assert cache.get("a", "2") is None
+    assert len(cache) == 0
+    assert cache.invalidations == 1
+
+
+def test_result_of_a_replaced_version_is_discarded():
+    cache = PredictionCache()
+    cache.get("slow", "1")  # a computation starts under version 1
+    cache.get("fresh", "2")  # a reload went live meanwhile
+    cache.put("fresh", "2", (0, 0.2))
+    assert cache.get("fresh", "2") == (0, 0.2)
+
+    cache.put("slow", "1", (1, 0.9))  # the version 1 computation finishes
+
+    assert cache.version == "2"
+    assert cache.get("fresh", "2") == (0, 0.2)
+    assert cache.get("slow", "2") is None
+    assert cache.discarded == 1
+
+
+def test_single_flight_shares_one_computation():
+    cache = PredictionCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return (1, 0.75)
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute("k", "1", compute) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert results == [(1, 0.75)] * 5
+    assert len(calls) == 1
+    assert cache.get("k", "1") == (1, 0.75)
+
+
+def test_single_flight_propagates_errors_without_caching():
+    cache = PredictionCache()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        return await asyncio.gather(
+            *(cache.get_or_compute("k", "1", compute) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(cache) == 0
+    assert cache.stats()["inflight"] == 0
+
+
+def test_cancelled_caller_leaves_computation_to_the_others():
+    cache = PredictionCache()
+    calls = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def compute():
+            calls.append(1)
+            await release.wait()
+            return (0, 0.25)
+
+        leader = asyncio.ensure_future(cache.get_or_compute("k", "1", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(cache.get_or_compute("k", "1", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await follower, leader.cancelled()
+
+    assert asyncio.run(main()) == ((0, 0.25), True)
+    assert len(calls) == 1
+    assert cache.get("k", "1") == (0, 0.25)
+    assert cache.stats()["inflight"] == 0
+
+
+def test_canonical_hash_ignores_field_order():
+    from src.schemas.churn_input import ChurnInput
+
+    fields = {name: (1.0 if info.annotation is float else 1 if info.annotation is int else "Yes")
+              for name, info in ChurnInput.model_fields.items()}
+    a = ChurnInput(**fields)
+    b = ChurnInput(**dict(reversed(list(fields.items()))))
+    assert a.canonical_hash() == b.canonical_hash()
+    assert a.canonical_hash() != a.model_copy(update={"MonthlyRevenue": 2.0}).canonical_hash()
@@ -0,0 +1,312 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from src.controllers.pagination import Page, Projection
+from src.controllers.routes import prediction
+from src.controllers.routes.prediction import (
+    PredictionFilters, _insert_prediction_rows, get_prediction, list_predictions, list_predictions_for_input,
+)
+from src.loaders.model_loader import ArtifactBundle
+from src.models.model import MLModel, Prediction, PredictionInput, PredictionLog, PredictionMetadata, User
+from src.schemas.churn_input import ChurnInput
+from src.utils.ids import new_ids
+
+CUSTOMER = {
+    "MonthlyRevenue": 59.99,
+    "MonthlyMinutes": 480.0,
+    "OverageMinutes": 12.0,
+    "UnansweredCalls": 3,
+    "CustomerCareCalls": 1,
+    "PercChangeMinutes": -4.0,
+    "PercChangeRevenues": 0.5,
+    "InboundCalls": 20,
+    "OutboundCalls": 31,
+    "ReceivedCalls": 95,
+    "TotalRecurringCharge": 45.0,
+    "CurrentEquipmentDays": 361,
+    "DroppedBlockedCalls": 4,
+    "MonthsInService": 26,
+    "ActiveSubs": 1,
+    "RespondsToMailOffers": "Yes",
+    "RetentionCalls": 0,
+    "RetentionOffersAccepted": 0,
+    "MadeCallToRetentionTeam": "No",
+    "ReferralsMadeBySubscriber": 0,
+    "CreditRating": "2-High",
+    "IncomeGroup": "4",
+    "Occupation": "Professional",
+    "PrizmCode": "Suburban",
+}
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    SQLModel.metadata.create_all(engine, tables=[
+        User.__table__, MLModel.__table__, PredictionInput.__table__, Prediction.__table__,
+        PredictionLog.__table__, PredictionMetadata.__table__,
+    ])
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def user(session):
+    user = User(username="analyst", hashed_password="x")
+    session.add(user)
+    session.commit()
+    return user
+
+
+@pytest.fixture
+def bundle(session):
+    model = MLModel(name="churn", version="1", description=None)
+    session.add(model)
+    session.commit()
+    return SimpleNamespace(model_id=model.id, version=model.version)
+
+
+def page(limit=100, cursor=None):
+    return Page(limit=limit, cursor=cursor, stream=False)
+
+
+def test_identical_inputs_share_one_input_row(session, user, bundle):
+    customer = ChurnInput(**CUSTOMER)
+    ids = new_ids(3)
+    _insert_prediction_rows(session, user, bundle, [(ids[0], customer, 1, 0.8)], "127.0.0.1", "pytest")
+    session.commit()
+    # Again, twice within one batch
+    rows = [(ids[1], ChurnInput(**CUSTOMER), 1, 0.8), (ids[2], ChurnInput(**CUSTOMER), 1, 0.8)]
+    _insert_prediction_rows(session, user, bundle, rows, "127.0.0.1", "pytest")
+    session.commit()
+
+    assert session.exec(select(PredictionInput.hash)).all() == [customer.canonical_hash()]
+    predictions = session.exec(select(Prediction)).all()
+    assert sorted(p.id for p in predictions) == ids
+    assert all(p.input_hash == customer.canonical_hash() and p.input_data is None for p in predictions)
+    assert len(session.exec(select(PredictionLog)).all()) == 3
+
+    reads = list_predictions_for_input(customer.canonical_hash(), Response(), page(), Projection(None), session, user)
+    assert [r.id for r in reads] == ids
+    assert all(json.loads(r.input_data) == customer.model_dump() for r in reads)
+
+
+def test_by_input_lists_only_that_input(session, user, bundle):
+    customer = ChurnInput(**CUSTOMER)
+    other = customer.model_copy(update={"MonthlyRevenue": 10.0})
+    ids = new_ids(2)
+    _insert_prediction_rows(session, user, bundle, [(ids[0], customer, 1, 0.8), (ids[1], other, 0, 0.1)], None, None)
+    session.commit()
+
+    reads = list_predictions_for_input(other.canonical_hash(), Response(), page(), Projection(None), session, user)
+    assert [r.id for r in reads] == [ids[1]]
+    assert list_predictions_for_input("0" * 64, Response(), page(), Projection(None), session, user) == []
+
+
+START = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def history(session, user):
+    """Twelve predictions a minute apart, alternating users, two models."""
+    other = User(username="other", hashed_password="x")
+    models = [MLModel(name="churn", version="1", description=None), MLModel(name="churn", version="2", description=None)]
+    session.add_all([other, *models])
+    session.commit()
+    rows = []
+    for i, pid in enumerate(new_ids(12)):
+        model = models[i // 6]
+        probability = i / 12
+        rows.append(Prediction(
+            id=pid,
+            user_id=(user if i % 2 == 0 else other).id,
+            prediction=int(probability > 0.5),
+            probability=probability,
+            model_id=model.id,
+            model_version=model.version,
+            created_at=START + timedelta(minutes=i),
+        ))
+    session.add_all(rows)
+    session.commit()
+    return [session.get(Prediction, r.id) for r in rows]
+
+
+def filters(**given):
+    names = ["user_id", "model_id", "model_version", "created_from", "created_to",
+             "min_probability", "max_probability", "prediction"]
+    return PredictionFilters(**{name: given.get(name) for name in names})
+
+
+def search(session, user, found, limit=100):
+    ids, cursor = [], None
+    while True:
+        response = Response()
+        reads = list_predictions(response, page(limit, cursor), found, Projection(None), session, user)
+        ids += [r.id for r in reads]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("given, matches", [
+    ({}, lambda p: True),
+    ({"model_id": 2}, lambda p: p.model_id == 2),
+    ({"model_version": "1"}, lambda p: p.model_version == "1"),
+    ({"prediction": 1}, lambda p: p.prediction == 1),
+    ({"min_probability": 0.25}, lambda p: p.probability >= 0.25),
+    ({"max_probability": 0.25}, lambda p: p.probability <= 0.25),
+    ({"min_probability": 0.25, "max_probability": 0.5}, lambda p: 0.25 <= p.probability <= 0.5),
+    ({"created_from": START + timedelta(minutes=3)}, lambda p: p.created_at >= START + timedelta(minutes=3)),
+    ({"created_to": START + timedelta(minutes=3)}, lambda p: p.created_at < START + timedelta(minutes=3)),
+    (
+        {"created_from": START + timedelta(minutes=2), "created_to": START + timedelta(minutes=9)},
+        lambda p: START + timedelta(minutes=2) <= p.created_at < START + timedelta(minutes=9),
+    ),
+])
+def test_each_filter(session, user, history, given, matches):
+    expected = [p.id for p in history if matches(p)]
+    assert expected  # every case selects something
+    assert search(session, user, filters(**given)) == expected
+
+
+def test_user_filter(session, user, history):
+    assert search(session, user, filters(user_id=user.id)) == [p.id for p in history if p.user_id == user.id]
+    assert search(session, user, filters(user_id=uuid4())) == []
+
+
+def test_combined_filters_page_through_keyset(session, user, history):
+    found = filters(
+        user_id=user.id,
+        model_version="2",
+        min_probability=0.5,
+        created_from=START + timedelta(minutes=1),
+    )
+    expected = [
+        p.id for p in history
+        if p.user_id == user.id and p.model_version == "2" and p.probability >= 0.5
+    ]
+    assert len(expected) == 3
+    assert search(session, user, found, limit=1) == expected
+    assert search(session, user, found, limit=2) == expected
+
+
+def test_naive_datetimes_are_utc(session, user, history):
+    naive = filters(created_from=datetime(2026, 3, 1, 0, 4), created_to=datetime(2026, 3, 1, 0, 7))
+    assert naive.created_from == START + timedelta(minutes=4)
+    assert naive.created_to.tzinfo == timezone.utc
+
+    # The same instant given in another offset selects the same rows
+    offset = timezone(timedelta(hours=2))
+    aware = filters(created_from=datetime(2026, 3, 1, 2, 4, tzinfo=offset), created_to=datetime(2026, 3, 1, 2, 7, tzinfo=offset))
+    expected = [p.id for p in history[4:7]]
+    assert search(session, user, naive) == expected
+    assert search(session, user, aware) == expected
+
+
+def test_legacy_rows_resolve_model_from_predictionmetadata(session, user, bundle):
+    legacy_model = MLModel(name="churn", version="0.9", description="before model columns")
+    session.add(legacy_model)
+    session.commit()
+    # Written by a release before model_id/model_version existed on predictions
+    old, new = new_ids(2)
+    session.add(Prediction(id=old, user_id=user.id, input_data='{"MonthlyRevenue": 1.0}', prediction=0, probability=0.2,
+                           created_at=START))
+    session.commit()
+    session.add(PredictionMetadata(prediction_id=old, model_id=legacy_model.id))
+    session.add(Prediction(id=new, user_id=user.id, prediction=1, probability=0.9, model_id=bundle.model_id,
+                           model_version=bundle.version, created_at=START + timedelta(minutes=1)))
+    session.commit()
+    assert session.get(Prediction, old).model_id is None
+
+    read = get_prediction(old, session, user)
+    assert (read.model_id, read.model_version) == (legacy_model.id, "0.9")
+    assert read.input_data == '{"MonthlyRevenue": 1.0}'
+
+    reads = list_predictions(Response(), page(), filters(), Projection(None), session, user)
+    assert [(r.id, r.model_id, r.model_version) for r in reads] == [
+        (old, legacy_model.id, "0.9"),
+        (new, bundle.model_id, bundle.version),
+    ]
+
+    projected = list_predictions(Response(), page(), filters(), Projection("id,model_version"), session, user)
+    assert json.loads(projected.body) == [
+        {"id": str(old), "model_version": "0.9"},
+        {"id": str(new), "model_version": bundle.version},
+    ]
+
+
+class RevenueFeatures:
+    def transform(self, frame):
+        return frame[["MonthlyRevenue"]].to_numpy()
+
+
+class RevenueModel:
+    """Churn probability is MonthlyRevenue / 100."""
+
+    def predict_proba(self, X):
+        p = X[:, 0] / 100
+        return np.column_stack([1 - p, p])
+
+
+@pytest.fixture
+def live(session, monkeypatch):
+    model = MLModel(name="churn", version="7", description=None)
+    session.add(model)
+    session.commit()
+    bundle = ArtifactBundle(
+        name="churn", version="7", model_id=model.id, model=None, fe=RevenueFeatures(), scorer=RevenueModel(),
+        threshold=0.5, feature_dtype=np.dtype("float64"),
+    )
+    monkeypatch.setattr(prediction.ModelArtifacts, "current", bundle)
+    return bundle
+
+
+def predict_batch(session, user, revenues):
+    data = [ChurnInput(**dict(CUSTOMER, MonthlyRevenue=r)) for r in revenues]
+    response = Response()
+    body = asyncio.run(prediction.predict_churn_batch(data, response, session, user, None, None, None))
+    return body, response
+
+
+def test_batch_results_keep_request_order(session, user, live):
+    body, response = predict_batch(session, user, [90.0, 10.0, 60.0, 40.0])
+
+    assert body["count"] == 4
+    assert [(r["prediction"], r["probability"]) for r in body["results"]] == [(1, 0.9), (0, 0.1), (1, 0.6), (0, 0.4)]
+    stored = {p.id: p for p in session.exec(select(Prediction)).all()}
+    for result in body["results"]:
+        row = stored[int(result["prediction_id"])]
+        assert (row.prediction, row.probability) == (result["prediction"], result["probability"])
+    assert len(session.exec(select(PredictionLog)).all()) == 4
+
+
+def test_batch_rows_carry_the_model_that_scored_them(session, user, live):
+    body, response = predict_batch(session, user, [90.0, 10.0])
+
+    assert body["model_version"] == "7" and response.headers["X-Model-Version"] == "7"
+    assert body["decision_threshold"] == 0.5
+    rows = session.exec(select(Prediction)).all()
+    assert [(r.model_id, r.model_version) for r in rows] == [(live.model_id, "7")] * 2
+
+
+def test_empty_and_oversized_batches_are_rejected(session, user, live, monkeypatch):
+    with pytest.raises(HTTPException) as empty:
+        predict_batch(session, user, [])
+    assert empty.value.status_code == 400
+
+    monkeypatch.setattr(prediction, "MAX_BATCH_SIZE", 2)
+    with pytest.raises(HTTPException) as oversized:
+        predict_batch(session, user, [1.0, 2.0, 3.0])
+    assert oversized.value.status_code == 413
+    assert session.exec(select(Prediction)).all() == []
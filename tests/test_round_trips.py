@@ -0,0 +1,63 @@
+import asyncio
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from starlette.concurrency import run_in_threadpool
+
+from src.db.instrumentation import count_round_trips, instrument
+
+
+def make_engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    instrument(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER)"))
+    return engine
+
+
+def test_counts_statements_and_commits():
+    engine = make_engine()
+
+    with count_round_trips() as trips:
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO t (v) VALUES (1)"))
+            conn.execute(text("INSERT INTO t (v) VALUES (2)"))
+
+    assert trips.count == 3  # 2 INSERTs (the first carrying BEGIN), COMMIT
+
+
+def test_nothing_counted_outside_a_counter():
+    engine = make_engine()
+    with count_round_trips() as trips:
+        pass
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO t (v) VALUES (1)"))
+    assert trips.count == 0
+
+
+def test_counter_follows_threadpool_calls():
+    engine = make_engine()
+
+    def write():
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO t (v) VALUES (1)"))
+
+    async def main():
+        with count_round_trips() as trips:
+            await run_in_threadpool(write)
+        return trips.count
+
+    assert asyncio.run(main()) == 2
+
+
+def test_rollback_is_counted():
+    engine = make_engine()
+
+    with count_round_trips() as trips:
+        with engine.connect() as conn:
+            conn.execute(text("INSERT INTO t (v) VALUES (1)"))
+            conn.rollback()
+
+    assert trips.count == 2
@@ -0,0 +1,102 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.ml.shadow import ShadowScorer, TokenBucket
+
+
+PRIMARY = SimpleNamespace(version="1")
+CANDIDATE = SimpleNamespace(version="2")
+
+
+def make_scorer(written, **kwargs):
+    def score_rows(inputs, bundle):
+        assert bundle is CANDIDATE
+        return np.array([x / 10.0 for x in inputs])
+
+    def write_rows(rows):
+        written.extend(rows)
+        done.set()
+
+    done = threading.Event()
+    scorer = ShadowScorer("2", lambda version: CANDIDATE, score_rows, write_rows, **kwargs)
+    return scorer, done
+
+
+def test_rows_are_compared_in_background():
+    written = []
+    scorer, done = make_scorer(written, rate_per_second=1000)
+
+    assert scorer.submit([1, 2], PRIMARY, [0.5, 0.6], [10, 11])
+    assert done.wait(5)
+    scorer.stop()
+
+    assert [(r["prediction_id"], r["primary_probability"], r["candidate_probability"]) for r in written] == [
+        (10, 0.5, 0.1),
+        (11, 0.6, 0.2),
+    ]
+    assert all(r["candidate_version"] == "2" and r["primary_version"] == "1" for r in written)
+    assert scorer.stats()["scored"] == 2
+
+
+def test_rate_limit_and_load_shedding_drop_rows():
+    written = []
+    scorer, _ = make_scorer(written, rate_per_second=0.001, burst=2)
+
+    assert scorer.submit([1, 2], PRIMARY, [0.5, 0.5], [1, 2])
+    assert not scorer.submit([3], PRIMARY, [0.5], [3])  # bucket empty
+
+    busy, _ = make_scorer(written, rate_per_second=1000, busy=lambda: True)
+    assert not busy.submit([1], PRIMARY, [0.5], [1])
+    scorer.stop()
+
+    assert scorer.stats()["dropped"] == 1
+    assert busy.stats()["dropped"] == 1
+
+
+def test_batch_larger_than_burst_is_sampled():
+    written = []
+    scorer, done = make_scorer(written, rate_per_second=0.001, burst=50)
+    rows = list(range(100))
+
+    assert scorer.submit(rows, PRIMARY, [0.5] * 100, rows)
+    assert done.wait(5)
+    scorer.stop()
+
+    assert [r["prediction_id"] for r in written] == rows[:50]
+    stats = scorer.stats()
+    assert (stats["submitted"], stats["dropped"], stats["scored"]) == (50, 50, 50)
+
+
+def test_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+    scorer = ShadowScorer(
+        "2",
+        lambda version: (release.wait(5), CANDIDATE)[1],
+        lambda inputs, bundle: np.zeros(len(inputs)),
+        lambda rows: None,
+        max_queue=1,
+        rate_per_second=1000,
+    )
+
+    results = [scorer.submit([i], PRIMARY, [0.5], [i]) for i in range(5)]
+    release.set()
+    scorer.stop()
+
+    assert results[0] and not all(results)
+    assert scorer.stats()["dropped"] >= 3
+
+
+def test_primary_version_is_not_shadowed():
+    scorer, _ = make_scorer([])
+    assert not scorer.submit([1], CANDIDATE, [0.5], [1])
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(rate=1000, burst=1)
+    assert bucket.take()
+    assert not bucket.take()
+    time.sleep(0.01)
+    assert bucket.take()
@@ -0,0 +1,83 @@
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+from sqlalchemy import event, insert, select
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, create_engine
+
+from src.db.write_behind import WriteBehindWriter
+from src.ml.shadow import ShadowScorer
+from src.models.model import MLModel, Prediction, PredictionInput, ShadowPrediction, User
+from src.utils.ids import new_id
+
+
+def make_engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    SQLModel.metadata.create_all(engine, tables=[
+        User.__table__, MLModel.__table__, PredictionInput.__table__, Prediction.__table__, ShadowPrediction.__table__,
+    ])
+    return engine
+
+
+def test_shadow_rows_persist_while_predictions_are_spilled(tmp_path):
+    engine = make_engine()
+    user_id = uuid4()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": user_id, "username": "u", "hashed_password": "x", "role": "USER",
+                                     "is_active": True, "created_at": datetime.now(timezone.utc),
+                                     "updated_at": datetime.now(timezone.utc)}])
+
+    db_down = threading.Event()
+    db_down.set()
+
+    def flush(records):
+        if db_down.is_set():
+            raise ConnectionError("database is down")
+        with engine.begin() as conn:
+            conn.execute(insert(Prediction), [
+                {"id": r["id"], "user_id": user_id, "prediction": 1, "probability": r["probability"],
+                 "created_at": datetime.now(timezone.utc)}
+                for r in records
+            ])
+
+    def write_shadow(rows):
+        with engine.begin() as conn:
+            conn.execute(insert(ShadowPrediction), [{**r, "created_at": datetime.now(timezone.utc)} for r in rows])
+        shadow_written.set()
+
+    shadow_written = threading.Event()
+    writer = WriteBehindWriter(flush, spill_dir=str(tmp_path), flush_interval_ms=10, retry_seconds=0.05)
+    candidate = SimpleNamespace(version="2")
+    scorer = ShadowScorer("2", lambda v: candidate, lambda inputs, b: np.array([0.7]), write_shadow,
+                          rate_per_second=1000)
+
+    prediction_id = new_id()
+    writer.submit([{"id": prediction_id, "probability": 0.6}])
+    scorer.submit(["row"], SimpleNamespace(version="1"), [0.6], [prediction_id])
+    assert shadow_written.wait(5)
+    scorer.stop()
+
+    # The prediction is still spilled, yet its shadow row is stored
+    deadline = time.monotonic() + 5
+    while writer.stats()["spilled"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with engine.connect() as conn:
+        assert conn.execute(select(Prediction.id)).all() == []
+        assert conn.execute(select(ShadowPrediction.prediction_id)).scalars().all() == [prediction_id]
+
+    db_down.clear()
+    while writer.stats()["replayed"] == 0 and time.monotonic() < deadline + 5:
+        time.sleep(0.01)
+    writer.stop()
+
+    with engine.connect() as conn:
+        joined = conn.execute(
+            select(ShadowPrediction.candidate_probability, Prediction.probability)
+            .join(Prediction, Prediction.id == ShadowPrediction.prediction_id)
+        ).all()
+    assert joined == [(0.7, 0.6)]
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from src.ml.tree_engine import CompiledForest, parity_probe
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 12))
+    y = (X[:, 0] + X[:, 1] * X[:, 2] + rng.normal(scale=0.5, size=2000) > 0).astype(int)
+    return X, y
+
+
+@pytest.mark.parametrize("estimator", [
+    RandomForestClassifier(n_estimators=30, random_state=0),
+    RandomForestClassifier(n_estimators=10, max_depth=4, random_state=1),
+    ExtraTreesClassifier(n_estimators=20, random_state=0),
+])
+def test_compiled_forest_matches_sklearn(data, estimator):
+    X, y = data
+    model = estimator.fit(X, y)
+    compiled = CompiledForest.from_sklearn(model)
+
+    np.testing.assert_allclose(compiled.predict_proba(X[:300]), model.predict_proba(X[:300]), atol=1e-12)
+    assert compiled.max_abs_diff(model, parity_probe(compiled)) < 1e-12
+
+
+def test_single_row(data):
+    X, y = data
+    model = RandomForestClassifier(n_estimators=15, random_state=0).fit(X, y)
+    compiled = CompiledForest.from_sklearn(model)
+
+    proba = compiled.predict_proba(X[:1])
+    assert proba.shape == (1, 2)
+    np.testing.assert_allclose(proba, model.predict_proba(X[:1]), atol=1e-12)
+
+
+def test_rejects_wrong_width(data):
+    X, y = data
+    compiled = CompiledForest.from_sklearn(RandomForestClassifier(n_estimators=3).fit(X, y))
+    with pytest.raises(ValueError):
+        compiled.predict_proba(X[:, :5])
+
+
+def test_rejects_non_forest(data):
+    X, y = data
+    with pytest.raises(ValueError):
+        CompiledForest.from_sklearn(LogisticRegression().fit(X, y))
+
+
+def test_rejects_multiclass(data):
+    X, _ = data
+    y = np.arange(len(X)) % 3
+    with pytest.raises(ValueError):
+        CompiledForest.from_sklearn(RandomForestClassifier(n_estimators=3).fit(X, y))
@@ -0,0 +1,105 @@
+import json
+import subprocess
+import sys
+import threading
+
+from src.db.write_behind import WriteBehindWriter
+
+
+class FlakyStore:
+    """Flush target keyed by id, so replays are idempotent like ON CONFLICT DO NOTHING."""
+
+    def __init__(self):
+        self.rows = {}
+        self.down = False
+        self.flushes = 0
+        self.flushed = threading.Event()
+
+    def flush(self, records):
+        if self.down:
+            raise ConnectionError("database is down")
+        self.flushes += 1
+        for r in records:
+            self.rows.setdefault(r["id"], r)
+        self.flushed.set()
+
+
+def records(ids):
+    return [{"id": i, "probability": i / 10} for i in ids]
+
+
+def make_writer(store, tmp_path, **kwargs):
+    kwargs.setdefault("flush_interval_ms", 10)
+    kwargs.setdefault("retry_seconds", 0.01)
+    return WriteBehindWriter(store.flush, spill_dir=str(tmp_path / "spill"), **kwargs)
+
+
+def test_records_are_flushed_in_batches(tmp_path):
+    store = FlakyStore()
+    writer = make_writer(store, tmp_path, batch_rows=100, flush_interval_ms=50)
+
+    writer.submit(records(range(10)))
+    writer.stop()
+
+    assert sorted(store.rows) == list(range(10))
+    assert store.flushes == 1
+    stats = writer.stats()
+    assert stats["flushed"] == 10 and stats["queue_depth"] == 0
+    assert stats["flush_ms"]["count"] == 1
+
+
+def test_failed_flush_spills_and_replays_after_recovery(tmp_path):
+    store = FlakyStore()
+    store.down = True
+    writer = make_writer(store, tmp_path)
+
+    writer.submit(records(range(5)))
+    writer.stop()
+    assert store.rows == {}
+    assert writer.stats()["spilled"] == 5
+    assert writer.stats()["spill_bytes"] > 0
+
+    store.down = False
+    writer = make_writer(store, tmp_path)
+    writer.submit(records([5]))
+    writer.stop()
+
+    assert sorted(store.rows) == list(range(6))
+    assert writer.stats()["replayed"] == 5
+    assert writer.stats()["spill_bytes"] == 0
+
+
+def test_full_queue_spills_off_the_calling_thread(tmp_path):
+    store = FlakyStore()
+    writer = make_writer(store, tmp_path, max_queue=2)
+    writer._run = writer._stopping.wait  # keep the queue from draining
+    spilled_on = []
+    spill = writer._spill
+    writer._spill = lambda records: (spilled_on.append(threading.current_thread().name), spill(records))
+
+    writer.submit(records(range(5)))
+    assert writer.stats()["queue_depth"] == 2
+    writer.stop()
+
+    assert spilled_on == ["write-behind-spill"]
+    spilled = [json.loads(line)["id"] for line in open(writer.spill_path)]
+    assert spilled == [2, 3, 4]
+
+
+def test_spill_files_of_dead_workers_are_replayed(tmp_path):
+    dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                          capture_output=True, text=True).stdout.strip()
+    spill_dir = tmp_path / "spill"
+    spill_dir.mkdir()
+    with open(spill_dir / f"spill-{dead}.jsonl", "w") as f:
+        for r in records([7, 8]):
+            f.write(json.dumps(r) + "\n")
+
+    store = FlakyStore()
+    writer = make_writer(store, tmp_path)
+    writer.submit(records([1]))
+    writer.stop()
+
+    assert sorted(store.rows) == [1, 7, 8]
+    assert list(spill_dir.iterdir()) == []
+